@@ -0,0 +1,208 @@
+"""
+Compares the GUI frame latency of decoding in the engine thread and in a
+separate decoder process.
+
+Every frame is requested from the GUI thread and timed until it arrives back
+in the GUI thread, while the GUI thread keeps busy with Python work like a
+real interface does. The lateness of a GUI timer shows the jank.
+
+Usage:
+    python -m benchmarks.decoder_latency video.mp4 [--frames 300] [--gui-load 4]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from PySide6.QtCore import (
+    QCoreApplication,
+    QEvent,
+    QEventLoop,
+    QObject,
+    QThread,
+    QTimer,
+    Signal,
+    Slot,
+)
+from PySide6.QtWidgets import QApplication
+
+from modules.video_engine import VideoEngine
+
+
+class LatencyProbe(QObject):
+    """
+    Requests the frames one after another from the GUI thread and records when
+    they arrive back in the GUI thread.
+    """
+
+    # emiter for the frame number to show
+    request_frame = Signal(int)
+
+    def __init__(self, engine: VideoEngine, frames: int, kill_at: int) -> None:
+        super().__init__()
+
+        self.engine = engine
+        self.frames = frames
+        self.kill_at = kill_at
+        self.frame_number = 0
+        self.requested_at = 0.0
+        self.start_time = 0.0
+        self.elapsed = 0.0
+        self.latencies = []
+        self.loop = QEventLoop()
+
+        self.request_frame.connect(engine.setVideoReaderPosition)
+        engine.emit_new_frame.connect(self.received)
+
+    def start(self) -> None:
+        self.start_time = time.perf_counter()
+        self._request()
+
+    @Slot(object)
+    def received(self, frame) -> None:
+        self.latencies.append(time.perf_counter() - self.requested_at)
+        self.frame_number += 1
+
+        if self.frame_number >= self.frames:
+            self.elapsed = time.perf_counter() - self.start_time
+            self.loop.quit()
+            return
+        self._request()
+
+    def _request(self) -> None:
+        # kill the decoder process once to measure the restart
+        if self.frame_number == self.kill_at:
+            process = getattr(self.engine.reader, "process", None)
+            if process is not None:
+                process.kill()
+
+        self.requested_at = time.perf_counter()
+        self.request_frame.emit(self.frame_number)
+
+
+def busyWork(milliseconds: float) -> None:
+    """
+    Keeps the GUI thread busy with Python work, holding the GIL.
+    """
+
+    end = time.perf_counter() + milliseconds / 1000
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def runMode(path: str, mode: str, frames: int, gui_load: float, kill_at: int) -> dict:
+    """
+    Plays the frames in one decoder mode and measures the latency.
+
+    Returns:
+        dict: The latency and GUI timer lateness in ms, the frames per second and
+            the decoder restarts.
+    """
+
+    engine = VideoEngine(path, decoder=mode)
+    thread = QThread()
+    engine.moveToThread(thread)
+    thread.start()
+
+    frames = min(frames, engine.max_frames)
+    probe = LatencyProbe(engine, frames, kill_at if mode == "process" else -1)
+
+    # a GUI timer with Python work, its lateness is the jank the user sees
+    interval = 16
+    lateness = []
+    last_tick = [time.perf_counter()]
+
+    def tick():
+        now = time.perf_counter()
+        lateness.append(max(0.0, (now - last_tick[0]) * 1000 - interval))
+        last_tick[0] = now
+        busyWork(gui_load)
+
+    timer = QTimer()
+    timer.timeout.connect(tick)
+    timer.start(interval)
+
+    # warm up the decoder, the process mode starts a new interpreter
+    engine.reader.seek(0)
+
+    probe.start()
+    probe.loop.exec()
+    timer.stop()
+
+    restarts = getattr(engine.reader, "restarts", 0)
+    latencies = [latency * 1000 for latency in probe.latencies]
+    elapsed = probe.elapsed
+    engine.stop()
+
+    # delete the Qt objects of this mode explicitly, so none of them is left
+    # to the garbage collector after the application is gone
+    engine.deleteLater()
+    thread.quit()
+    thread.wait()
+    probe.deleteLater()
+    timer.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    return {
+        "mode": mode,
+        "latency_median": statistics.median(latencies),
+        "latency_p95": percentile(latencies, 0.95),
+        "latency_max": max(latencies),
+        "jank_p95": percentile(lateness, 0.95) if lateness else 0.0,
+        "fps": frames / elapsed,
+        "restarts": restarts,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="the video to play")
+    parser.add_argument("--frames", type=int, default=300, help="frames to play")
+    parser.add_argument(
+        "--gui-load", type=float, default=4.0, help="ms of Python work per GUI tick"
+    )
+    parser.add_argument(
+        "--kill-at",
+        type=int,
+        default=-1,
+        help="kill the decoder process at this frame to measure a restart",
+    )
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    results = [
+        runMode(args.path, mode, args.frames, args.gui_load, args.kill_at)
+        for mode in ("thread", "process")
+    ]
+
+    print(
+        f"{'mode':<8} {'median ms':>10} {'p95 ms':>8} {'max ms':>8} "
+        f"{'jank p95 ms':>12} {'fps':>7} {'restarts':>9}"
+    )
+    for result in results:
+        print(
+            f"{result['mode']:<8} {result['latency_median']:>10.2f} "
+            f"{result['latency_p95']:>8.2f} {result['latency_max']:>8.2f} "
+            f"{result['jank_p95']:>12.2f} {result['fps']:>7.1f} "
+            f"{result['restarts']:>9}"
+        )
+
+    app.quit()
+
+    # skip the interpreter teardown, PySide6 6.12 drops a reference to True on
+    # every signal emit, and a long run makes the teardown abort on it
+    sys.stdout.flush()
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
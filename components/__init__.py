@@ -2,5 +2,18 @@ from .info_table import VideoInfoTable
 from .video_streamer import VideoStreamer
 from .image_extractor import ImageExtractor
 from .video_editor import VideoEditor
+from .timeline_slider import TimelineSlider
+from .video_display import VideoDisplay
+from .image_viewer import ImageViewer
+from .compare_view import CompareView
 
-__all__ = ["VideoInfoTable", "VideoStreamer", "ImageExtractor", "VideoEditor"]
+__all__ = [
+    "VideoInfoTable",
+    "VideoStreamer",
+    "ImageExtractor",
+    "VideoEditor",
+    "TimelineSlider",
+    "VideoDisplay",
+    "ImageViewer",
+    "CompareView",
+]
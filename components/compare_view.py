@@ -0,0 +1,169 @@
+from PySide6.QtWidgets import (
+    QWidget,
+    QHBoxLayout,
+    QVBoxLayout,
+    QPushButton,
+    QLabel,
+    QSizePolicy,
+)
+from PySide6.QtCore import Qt
+
+from components.timeline_slider import TimelineSlider
+from components.video_display import VideoDisplay
+from modules.sync_controller import SyncController
+
+
+class CompareView(QWidget):
+    """
+    CompareView component to play two or more videos side by side on one clock.
+    Methods:
+        changeFrame(delta): Steps all videos by frames of the first video.
+        updateTime(t): Moves the slider to the clock time.
+        updateStats(stats): Shows the sync drift and throughput of every video.
+        slided(): Seeks all videos to the slider position.
+        stream(): Toggles playback state between play and pause.
+    """
+
+    def __init__(self, controller: SyncController) -> None:
+        """
+        Define the layout for the compare view component.
+        Args:
+            controller (SyncController): The controller driving the videos.
+        """
+
+        super().__init__()
+
+        # hook the controller
+        self.controller = controller
+
+        layout = QVBoxLayout()
+
+        # ---------------- Video Frames -----------------------
+        displays_layout = QHBoxLayout()
+        self.displays = []
+        self.stats_labels = []
+
+        for engine in self.controller.engines:
+            column = QVBoxLayout()
+
+            title = QLabel(engine.file_name)
+            title.setAlignment(Qt.AlignCenter)
+            column.addWidget(title)
+
+            display = VideoDisplay(engine)
+            display.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+            display.setStyleSheet("background-color: #444; border: 1px solid #666;")
+            display.setAlignment(Qt.AlignCenter)
+            engine.emit_new_frame.connect(display.setFrame)
+            column.addWidget(display)
+
+            stats_label = QLabel("-")
+            stats_label.setAlignment(Qt.AlignCenter)
+            column.addWidget(stats_label)
+
+            displays_layout.addLayout(column)
+            self.displays.append(display)
+            self.stats_labels.append(stats_label)
+
+        layout.addLayout(displays_layout)
+
+        # Slider in frames of the first video
+        self.slider = TimelineSlider()
+        self.slider.setRange(
+            0, max(0, int(self.controller.duration * self.controller.fps) - 1)
+        )
+        self.slider.sliderReleased.connect(self.slided)
+        layout.addWidget(self.slider)
+
+        self.controller.emit_time.connect(self.updateTime)
+        self.controller.emit_stats.connect(self.updateStats)
+
+        # ---------------- Control Buttons -----------------------
+        control_layout = QHBoxLayout()
+
+        for delta in (-10, -1):
+            button = QPushButton(f"{delta}")
+            button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+            button.clicked.connect(lambda _, delta=delta: self.changeFrame(delta))
+            control_layout.addWidget(button)
+
+        # the play / pause button
+        self.bt_play = QPushButton("Play")
+        self.bt_play.setObjectName("PlayButton")
+        self.bt_play.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.bt_play.clicked.connect(self.stream)
+        control_layout.addWidget(self.bt_play)
+
+        for delta in (1, 10):
+            button = QPushButton(f"+{delta}")
+            button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+            button.clicked.connect(lambda _, delta=delta: self.changeFrame(delta))
+            control_layout.addWidget(button)
+
+        layout.addLayout(control_layout)
+
+        self.setLayout(layout)
+
+    #
+    # -------------------------------- FUNCTIONS --------------------------------------
+    #
+
+    def resizeEvent(self, event):
+        for display, engine in zip(self.displays, self.controller.engines):
+            frame = engine.getFrame()
+            if frame is not None:
+                display.setFrame(frame)
+        super().resizeEvent(event)
+
+    def changeFrame(self, delta: int) -> None:
+        """
+        Steps all videos by frames of the first video.
+        Args:
+            delta (int): The amount of change.
+        """
+
+        self.controller.step(delta)
+
+    def updateTime(self, t: float) -> None:
+        """
+        Moves the slider to the clock time, unless the user is dragging it.
+        Args:
+            t (float): The clock time in seconds.
+        """
+
+        if not self.slider.isSliderDown():
+            self.slider.setValue(int(t * self.controller.fps + 1e-6))
+
+        # the controller stops at the end of the shortest video
+        if not self.controller.state_playing:
+            self.bt_play.setText("Play")
+
+    def updateStats(self, stats: list[dict]) -> None:
+        """
+        Shows the sync drift and throughput of every video.
+        Args:
+            stats (list[dict]): The stats per video from the controller.
+        """
+
+        for label, stream in zip(self.stats_labels, stats):
+            label.setText(
+                f"Frame {stream['frame'] + 1} | "
+                f"Drift {stream['drift']:+.1f} ms (max {stream['max_drift']:.1f} ms) | "
+                f"{stream['fps']} fps | "
+                f"{stream['dropped']} dropped"
+            )
+
+    def slided(self) -> None:
+        """
+        Seeks all videos to the slider position.
+        """
+
+        self.controller.seek(self.slider.value() / self.controller.fps)
+
+    def stream(self) -> None:
+        """
+        Toggles playback state between play and pause.
+        """
+
+        self.controller.play(not self.controller.state_playing)
+        self.bt_play.setText("Pause" if self.controller.state_playing else "Play")
@@ -10,11 +10,17 @@ from PySide6.QtWidgets import (
     QFileDialog,
     QSizePolicy,
     QDialog,
+    QSpinBox,
+    QProgressBar,
+    QComboBox,
 )
-from PySide6.QtGui import QPixmap, QIcon
-from PySide6.QtCore import QSize, Qt
+from PySide6.QtGui import QPixmap, QIcon, QImageReader
+from PySide6.QtCore import QSize, Qt, QThread, Signal
 
 from modules.video_engine import VideoEngine
+from modules.frame_exporter import FrameExporter
+from modules.seek_planner import loadTargets
+from components.image_viewer import ImageViewer
 
 
 class ImageExtractor(QWidget):
@@ -25,8 +31,21 @@ class ImageExtractor(QWidget):
         load_output_images(): Loads images from the selected output folder into the list.
         save(): Saves the current active frame as an image in the selected output folder.
         show_full_image(item): Displays the full image in a dialog when an item is clicked.
+        export_ranges(): Exports the marked ranges in the background.
+        export_list(): Exports the frames of a timestamp or frame number list in the background.
+        stop(): Stops a running export and its thread.
     """
 
+    # emiter to start the export in the exporter thread
+    request_export = Signal(object, int, object, str, str, object)
+    request_export_targets = Signal(object, object, str, str, object)
+    # emiter for the save folder, queued into the engine thread, because saving
+    # decodes the full resolution frame when the preview is reduced
+    request_save = Signal(str)
+    # emiter for the in mark, queued into the engine thread in order with the
+    # out mark, which reads the mark in the engine thread
+    request_mark_in = Signal()
+
     def __init__(self, video_engine: VideoEngine, parent=None) -> None:
         """
         Set up the layout
@@ -62,6 +81,87 @@ class ImageExtractor(QWidget):
 
         self.main_layout.addLayout(top_bar)
 
+        # ---------------- Range Export -----------------------
+        range_bar = QHBoxLayout()
+
+        bt_mark_in = QPushButton("Mark In")
+        bt_mark_in.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        bt_mark_in.clicked.connect(self.mark_in)
+        range_bar.addWidget(bt_mark_in)
+
+        bt_mark_out = QPushButton("Mark Out")
+        bt_mark_out.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        bt_mark_out.clicked.connect(self.video_engine.markOut)
+        range_bar.addWidget(bt_mark_out)
+
+        bt_clear = QPushButton("Clear Ranges")
+        bt_clear.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        bt_clear.clicked.connect(self.video_engine.clearExportRanges)
+        range_bar.addWidget(bt_clear)
+
+        # export every Nth frame
+        range_bar.addWidget(QLabel("Every"))
+        self.step_input = QSpinBox()
+        self.step_input.setRange(1, 10000)
+        range_bar.addWidget(self.step_input)
+
+        self.bt_export = QPushButton("Export Ranges")
+        self.bt_export.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.bt_export.clicked.connect(self.export_ranges)
+        range_bar.addWidget(self.bt_export)
+
+        self.range_label = QLabel("No ranges marked")
+        self.range_label.setStyleSheet("color: white")
+        range_bar.addWidget(self.range_label)
+
+        self.main_layout.addLayout(range_bar)
+
+        # ---------------- List Export -----------------------
+        list_bar = QHBoxLayout()
+
+        # the unit of list values without a named column or key
+        self.unit_input = QComboBox()
+        self.unit_input.addItem("Timestamps (s)", "seconds")
+        self.unit_input.addItem("Frame Numbers", "frames")
+        self.unit_input.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        list_bar.addWidget(self.unit_input)
+
+        self.bt_export_list = QPushButton("Export List")
+        self.bt_export_list.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.bt_export_list.clicked.connect(self.export_list)
+        list_bar.addWidget(self.bt_export_list)
+
+        self.report_label = QLabel("")
+        self.report_label.setStyleSheet("color: white")
+        list_bar.addWidget(self.report_label)
+
+        self.main_layout.addLayout(list_bar)
+
+        self.export_progress = QProgressBar()
+        self.export_progress.setVisible(False)
+        self.main_layout.addWidget(self.export_progress)
+
+        self.video_engine.emit_export_ranges.connect(self.update_ranges)
+        self.request_save.connect(self.video_engine.save)
+        self.request_mark_in.connect(self.video_engine.markIn)
+        self.video_engine.emit_saved.connect(lambda _: self.load_output_images())
+
+        # run the exporter in its own thread, so it does not block the video engine
+        self.exporter_thread = QThread()
+        self.exporter = FrameExporter(
+            self.video_engine.path,
+            self.video_engine.file_name,
+            self.video_engine.max_frames,
+        )
+        self.exporter.moveToThread(self.exporter_thread)
+        self.request_export.connect(self.exporter.export)
+        self.request_export_targets.connect(self.exporter.exportTargets)
+        self.exporter.emit_progress.connect(self.update_export_progress)
+        self.exporter.emit_finished.connect(self.export_finished)
+        self.exporter.emit_report.connect(self.update_report)
+        self.exporter.emit_error.connect(self.report_label.setText)
+        self.exporter_thread.start()
+
         # Image list
         self.image_list = QListWidget()
         self.image_list.setViewMode(QListWidget.IconMode)
@@ -104,11 +204,13 @@ class ImageExtractor(QWidget):
                 full_path = os.path.join(self.output_path, filename)
 
                 # create an icon from that image and add it to the list
-                icon = QIcon(
-                    QPixmap(full_path).scaled(
-                        100, 100, Qt.KeepAspectRatio, Qt.SmoothTransformation
-                    )
-                )
+                # decode it at thumbnail size, so large frames are never
+                # loaded at full resolution
+                reader = QImageReader(full_path)
+                size = reader.size()
+                size.scale(100, 100, Qt.KeepAspectRatio)
+                reader.setScaledSize(size)
+                icon = QIcon(QPixmap.fromImage(reader.read()))
                 item = QListWidgetItem(icon, filename)
                 item.setData(Qt.UserRole, full_path)
                 self.image_list.addItem(item)
@@ -118,21 +220,21 @@ class ImageExtractor(QWidget):
         Saves the frame to the selected output folder.
         """
 
+        # the list is updated when the engine has saved the frame
         if self.output_path:
-            self.video_engine.save(self.output_path)
-            # update the list
-            self.load_output_images()
+            self.request_save.emit(self.output_path)
 
     def show_full_image(self, item):
         """
         Displays the full image in a dialog when an item is clicked.
+        The image is shown at reduced resolution first and full resolution
+        tiles are loaded in the background when zooming in.
 
         Args:
             item (QListWidgetItem): The item clicked in the list.
         """
 
         full_path = item.data(Qt.UserRole)
-        pixmap = QPixmap(full_path)
 
         # create the dialog
         dialog = QDialog(self)
@@ -140,14 +242,149 @@ class ImageExtractor(QWidget):
         dialog.setMinimumSize(820, 600)
         dialog.setStyleSheet("background-color: black;")
 
-        # image label
-        image_label = QLabel()
-        image_label.setPixmap(pixmap.scaledToWidth(800, Qt.SmoothTransformation))
-        image_label.setAlignment(Qt.AlignCenter)
+        # zoomable image view
+        try:
+            viewer = ImageViewer(full_path)
+        except ValueError:
+            return
 
         # layout
         layout = QVBoxLayout()
-        layout.addWidget(image_label)
+        layout.addWidget(viewer)
         dialog.setLayout(layout)
 
         dialog.exec()
+        viewer.stop()
+
+    def mark_in(self):
+        """
+        Marks the active frame as the start of an export range.
+        """
+
+        self.request_mark_in.emit()
+        self.range_label.setText(f"In: {self.video_engine.getVideoReaderPosition()}")
+
+    def update_ranges(self, ranges: list[tuple[int, int]]) -> None:
+        """
+        Shows the marked export ranges.
+
+        Args:
+            ranges (list[tuple[int, int]]): The (in, out) frame numbers, both inclusive.
+        """
+
+        if not ranges:
+            self.range_label.setText("No ranges marked")
+            return
+
+        # show the frame numbers like the saved file names
+        self.range_label.setText(
+            ", ".join(f"{start + 1}-{end + 1}" for start, end in ranges)
+        )
+
+    def export_ranges(self):
+        """
+        Exports the marked ranges with the current crop to the selected output
+        folder in the background.
+        """
+
+        ranges = self.video_engine.getExportRanges()
+        if not self.output_path or not ranges:
+            return
+
+        self.bt_export.setEnabled(False)
+        self.bt_export_list.setEnabled(False)
+        self.export_progress.setVisible(True)
+        self.request_export.emit(
+            ranges,
+            self.step_input.value(),
+            self.video_engine.getCropValues(),
+            self.video_engine.pipeline.toJSON(),
+            self.output_path,
+            self.video_engine.getRegions(),
+        )
+
+    def export_list(self):
+        """
+        Opens a CSV or JSON list of timestamps or frame numbers and exports the
+        frames with the current crop to the selected output folder in the background.
+        """
+
+        if not self.output_path:
+            return
+
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Select Timestamp List",
+            "",
+            "Timestamp Lists (*.csv *.json *.txt);;All Files (*)",
+        )
+        if not file_path:
+            return
+
+        try:
+            frame_numbers = loadTargets(
+                file_path, self.video_engine.fps, self.unit_input.currentData()
+            )
+        except ValueError as error:
+            self.report_label.setText(str(error))
+            return
+
+        self.bt_export.setEnabled(False)
+        self.bt_export_list.setEnabled(False)
+        self.export_progress.setVisible(True)
+        self.report_label.setText(f"{len(frame_numbers)} targets")
+        self.request_export_targets.emit(
+            frame_numbers,
+            self.video_engine.getCropValues(),
+            self.video_engine.pipeline.toJSON(),
+            self.output_path,
+            self.video_engine.getRegions(),
+        )
+
+    def update_report(self, report: dict) -> None:
+        """
+        Shows the decode work of a list export.
+
+        Args:
+            report (dict): The report from FrameExporter.exportTargets.
+        """
+
+        self.report_label.setText(
+            f"Saved {report['saved']} of {report['targets']} frames "
+            f"({report['requested']} listed), "
+            f"{report['seeks']} seeks, {report['decoded']} frames decoded"
+        )
+
+    def update_export_progress(self, done: int, total: int) -> None:
+        """
+        Updates the export progress bar.
+
+        Args:
+            done (int): The number of frames saved so far.
+            total (int): The number of frames to save.
+        """
+
+        self.export_progress.setRange(0, total)
+        self.export_progress.setValue(done)
+
+    def export_finished(self, saved: int) -> None:
+        """
+        Resets the export controls and shows the exported images.
+
+        Args:
+            saved (int): The number of frames saved.
+        """
+
+        self.bt_export.setEnabled(True)
+        self.bt_export_list.setEnabled(True)
+        self.export_progress.setVisible(False)
+        self.load_output_images()
+
+    def stop(self):
+        """
+        Cancels a running export and stops the exporter thread.
+        """
+
+        self.exporter.cancel()
+        self.exporter_thread.quit()
+        self.exporter_thread.wait()
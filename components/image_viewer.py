@@ -0,0 +1,523 @@
+import math
+import threading
+from collections import OrderedDict
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import (
+    QObject,
+    QThread,
+    Qt,
+    QPointF,
+    QRect,
+    QRectF,
+    QSize,
+    Signal,
+    Slot,
+)
+from PySide6.QtGui import QImage, QImageIOHandler, QImageReader, QPainter
+
+from configs.globals import (
+    VIEWER_TILE_SIZE,
+    VIEWER_TILE_CACHE_SIZE,
+    VIEWER_PREVIEW_SIZE,
+)
+from modules.memory_budget import memory_budget
+
+
+class TileLoader(QObject):
+    """
+    Decodes the reduced image and the image tiles in a background thread. A
+    tile is only the region of the image it covers, decoded at the resolution
+    of its level. Formats that can't decode regions, like png, are decoded
+    once and the tiles are cut from the decoded image and the downscaled copy
+    of the level in use. The decoded image is evicted under memory pressure
+    and decoded again when a tile needs it.
+    Methods:
+        loadPreview(): Decodes the reduced image.
+        setWanted(keys): Sets the tiles that are still needed.
+        load(key): Decodes a tile if it is still needed.
+        evict(nbytes): Drops the decoded image and its downscaled copy.
+        release(): Drops the decoded image and its downscaled copy.
+    """
+
+    # the decoded image is expensive to decode again, so it is evicted after the tiles
+    PRIORITY = 1
+
+    # emiters for the reduced image and finished tiles
+    emit_preview = Signal(QImage)
+    emit_tile = Signal(object, QImage)
+
+    def __init__(
+        self, path: str, width: int, height: int, preview_size: QSize, regions: bool
+    ) -> None:
+        """
+        Set up the loader.
+        Args:
+            path (str): The path of the image.
+            width (int): The full width of the image.
+            height (int): The full height of the image.
+            preview_size (QSize): The size of the reduced image.
+            regions (bool): True if the format can decode regions.
+        """
+
+        super().__init__()
+
+        self.path = path
+        self.width = width
+        self.height = height
+        self.preview_size = preview_size
+        self.regions = regions
+        self.wanted = set()
+        self.lock = threading.Lock()
+
+        # the decoded image and the level in use, level n is downscaled by
+        # 2**n. Both are counted against the budget, which can evict them
+        self.levels = {}
+        self.levels_lock = threading.Lock()
+        memory_budget.register(self, self.PRIORITY)
+
+    @Slot()
+    def loadPreview(self) -> None:
+        """
+        Decodes the reduced image.
+        """
+
+        if self.regions:
+            reader = QImageReader(self.path)
+            reader.setScaledSize(self.preview_size)
+            image = reader.read()
+        else:
+            # the whole image is decoded anyway, keep it for the tiles
+            image = self._levelImage(0)
+            if image is not None:
+                image = image.scaled(
+                    self.preview_size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation
+                )
+
+        if image is not None and not image.isNull():
+            self.emit_preview.emit(image)
+
+    def setWanted(self, keys: set) -> None:
+        """
+        Sets the tiles that are still needed, requests for other tiles are skipped.
+        Args:
+            keys (set): The (level, column, row) keys of the visible tiles.
+        """
+
+        with self.lock:
+            self.wanted = set(keys)
+
+    @Slot(object)
+    def load(self, key: tuple[int, int, int]) -> None:
+        """
+        Decodes a tile if it is still needed.
+        Args:
+            key (tuple[int, int, int]): The level, column and row of the tile.
+        """
+
+        with self.lock:
+            if key not in self.wanted:
+                return
+
+        level, column, row = key
+        scale = 2**level
+        scaled_width = math.ceil(self.width / scale)
+        scaled_height = math.ceil(self.height / scale)
+        x = column * VIEWER_TILE_SIZE
+        y = row * VIEWER_TILE_SIZE
+
+        rect = QRect(
+            x,
+            y,
+            min(VIEWER_TILE_SIZE, scaled_width - x),
+            min(VIEWER_TILE_SIZE, scaled_height - y),
+        )
+
+        if not self.regions:
+            image = self._levelImage(level)
+            if image is not None:
+                self.emit_tile.emit(key, image.copy(rect))
+            return
+
+        # only decode the region of the tile, at the resolution of its level
+        reader = QImageReader(self.path)
+        if level > 0:
+            reader.setScaledSize(QSize(scaled_width, scaled_height))
+        reader.setScaledClipRect(rect)
+
+        image = reader.read()
+        if not image.isNull():
+            self.emit_tile.emit(key, image)
+
+    def evict(self, nbytes: int) -> int:
+        """
+        Drops the downscaled copy first and then the decoded image to free memory.
+        Args:
+            nbytes (int): The number of bytes to free.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+
+        with self.levels_lock:
+            freed = 0
+            for level in sorted(self.levels, reverse=True):
+                if freed >= nbytes:
+                    break
+                freed += self.levels.pop(level).sizeInBytes()
+            return freed
+
+    def release(self) -> None:
+        """
+        Drops the decoded image and its downscaled copy.
+        """
+
+        with self.levels_lock:
+            freed = sum(image.sizeInBytes() for image in self.levels.values())
+            self.levels = {}
+        memory_budget.release(self, freed)
+
+    def _levelImage(self, level: int) -> None | QImage:
+        """
+        Helper function to get a level of the decoded image, decoding the image
+        or downscaling it when the level is not kept. Only the decoded image and
+        the last used level are kept, so the memory is at most a third more than
+        the decoded image.
+        """
+
+        with self.levels_lock:
+            image = self.levels.get(level)
+        if image is not None:
+            return image
+
+        # decode and scale without holding the lock, so an eviction from
+        # another thread never waits for it
+        if level == 0:
+            image = QImageReader(self.path).read()
+            if image.isNull():
+                return None
+        else:
+            source = self._levelImage(0)
+            if source is None:
+                return None
+            scale = 2**level
+            image = source.scaled(
+                math.ceil(self.width / scale),
+                math.ceil(self.height / scale),
+                Qt.IgnoreAspectRatio,
+                Qt.SmoothTransformation,
+            )
+
+        with self.levels_lock:
+            freed = 0
+            if level > 0:
+                for other in [other for other in self.levels if other > 0]:
+                    freed += self.levels.pop(other).sizeInBytes()
+            self.levels[level] = image
+
+        # reserve outside of the lock, the budget may evict this loader
+        memory_budget.release(self, freed)
+        memory_budget.reserve(self, image.sizeInBytes())
+        return image
+
+
+class ImageViewer(QWidget):
+    """
+    Zoomable and pannable image view that shows a reduced image as soon as it
+    is decoded and loads full resolution tiles in the background as the user
+    zooms in. Only a small tile cache is kept, so the memory stays flat for any
+    image size. Images in formats that can't decode regions, like png, are
+    decoded once in the background and kept while the memory budget allows.
+    Methods:
+        fit(): Fits the whole image into the view.
+        setPreview(image): Shows the reduced image.
+        evict(nbytes): Drops the least recently used tiles to free memory.
+        stop(): Stops the tile loader thread.
+    """
+
+    # tiles are cheap to load again, so they are evicted first
+    PRIORITY = 0
+
+    # emiter to request a tile from the loader thread
+    request_tile = Signal(object)
+
+    def __init__(self, path: str, parent=None) -> None:
+        """
+        Set up the view and show the reduced image.
+        Args:
+            path (str): The path of the image.
+            parent: Parent widget for this component.
+        """
+
+        super().__init__(parent)
+
+        reader = QImageReader(path)
+        size = reader.size()
+        if not size.isValid():
+            raise ValueError(f"Unable to read image: {path}")
+
+        self.image_width = size.width()
+        self.image_height = size.height()
+        preview_size = size
+        if max(self.image_width, self.image_height) > VIEWER_PREVIEW_SIZE:
+            preview_size = size.scaled(
+                VIEWER_PREVIEW_SIZE, VIEWER_PREVIEW_SIZE, Qt.KeepAspectRatio
+            )
+
+        # the reduced image is decoded in the loader thread and shown when it
+        # arrives, so opening a large image never blocks the GUI
+        self.preview = None
+        self.preview_scale = preview_size.width() / self.image_width
+
+        # the view is defined by the zoom and the image point in its center
+        self.zoom = None
+        self.center = QPointF(self.image_width / 2, self.image_height / 2)
+        self.drag_position = None
+
+        # the least recently used tile comes first
+        self.tiles = OrderedDict()
+        self.tiles_lock = threading.Lock()
+        self.requested = set()
+        memory_budget.register(self, self.PRIORITY)
+
+        # formats without region decoding would decode the whole image for
+        # every tile, so the loader decodes them once and cuts the tiles
+        regions = reader.supportsOption(QImageIOHandler.ImageOption.ScaledClipRect)
+
+        # load the reduced image and the tiles in their own thread, so the
+        # GUI never decodes
+        self.loader_thread = QThread()
+        self.loader = TileLoader(
+            path, self.image_width, self.image_height, preview_size, regions
+        )
+        self.loader.moveToThread(self.loader_thread)
+        self.loader_thread.started.connect(self.loader.loadPreview)
+        self.request_tile.connect(self.loader.load)
+        self.loader.emit_preview.connect(self.setPreview)
+        self.loader.emit_tile.connect(self.addTile)
+        self.loader_thread.start()
+
+    #
+    # -------------------------------- FUNCTIONS --------------------------------------
+    #
+
+    def fit(self) -> None:
+        """
+        Fits the whole image into the view.
+        """
+
+        self.zoom = min(
+            self.width() / self.image_width, self.height() / self.image_height
+        )
+        self.center = QPointF(self.image_width / 2, self.image_height / 2)
+        self.update()
+
+    def setPreview(self, image: QImage) -> None:
+        """
+        Shows the reduced image.
+        Args:
+            image (QImage): The decoded reduced image.
+        """
+
+        self.preview = image
+        self.update()
+
+    def addTile(self, key: tuple[int, int, int], image: QImage) -> None:
+        """
+        Adds a loaded tile to the cache.
+        Args:
+            key (tuple[int, int, int]): The level, column and row of the tile.
+            image (QImage): The decoded tile.
+        """
+
+        self.requested.discard(key)
+
+        freed = 0
+        with self.tiles_lock:
+            self.tiles[key] = image
+            while len(self.tiles) > VIEWER_TILE_CACHE_SIZE:
+                freed += self.tiles.popitem(last=False)[1].sizeInBytes()
+
+        memory_budget.release(self, freed)
+        memory_budget.reserve(self, image.sizeInBytes())
+        self.update()
+
+    def evict(self, nbytes: int) -> int:
+        """
+        Drops the least recently used tiles to free memory.
+        Args:
+            nbytes (int): The number of bytes to free.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+
+        with self.tiles_lock:
+            freed = 0
+            while freed < nbytes and self.tiles:
+                freed += self.tiles.popitem(last=False)[1].sizeInBytes()
+            return freed
+
+    def stop(self) -> None:
+        """
+        Stops the tile loader thread and drops the tiles.
+        """
+
+        self.loader.setWanted(set())
+        self.loader_thread.quit()
+        self.loader_thread.wait()
+        self.loader.release()
+
+        with self.tiles_lock:
+            freed = sum(tile.sizeInBytes() for tile in self.tiles.values())
+            self.tiles.clear()
+        memory_budget.release(self, freed)
+
+    def _imageRect(self) -> QRectF:
+        """
+        Helper function to get the area of the whole image in view coordinates.
+        """
+
+        return QRectF(
+            self.width() / 2 - self.center.x() * self.zoom,
+            self.height() / 2 - self.center.y() * self.zoom,
+            self.image_width * self.zoom,
+            self.image_height * self.zoom,
+        )
+
+    def _toImage(self, position: QPointF) -> QPointF:
+        """
+        Helper function to map a view position to image coordinates.
+        """
+
+        return QPointF(
+            self.center.x() + (position.x() - self.width() / 2) / self.zoom,
+            self.center.y() + (position.y() - self.height() / 2) / self.zoom,
+        )
+
+    def _level(self) -> None | int:
+        """
+        Helper function to get the tile level for the zoom, None while the
+        reduced image has enough detail.
+        """
+
+        if self.zoom <= self.preview_scale:
+            return None
+
+        # the coarsest level that still has a pixel per view pixel
+        return max(0, math.floor(math.log2(1 / self.zoom)))
+
+    def _visibleTiles(self, level: int) -> list[tuple[int, int, int]]:
+        """
+        Helper function to get the tiles that cover the view.
+        """
+
+        span = VIEWER_TILE_SIZE * 2**level
+        top_left = self._toImage(QPointF(0, 0))
+        bottom_right = self._toImage(QPointF(self.width(), self.height()))
+
+        first_column = max(0, math.floor(top_left.x() / span))
+        first_row = max(0, math.floor(top_left.y() / span))
+        last_column = min(
+            math.ceil(self.image_width / span) - 1, math.floor(bottom_right.x() / span)
+        )
+        last_row = min(
+            math.ceil(self.image_height / span) - 1, math.floor(bottom_right.y() / span)
+        )
+
+        return [
+            (level, column, row)
+            for row in range(first_row, last_row + 1)
+            for column in range(first_column, last_column + 1)
+        ]
+
+    #
+    # -------------------------------- EVENTS --------------------------------------
+    #
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+
+        if self.zoom is None:
+            self.fit()
+
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        image_rect = self._imageRect()
+        if self.preview is not None:
+            painter.drawImage(image_rect, self.preview)
+
+        level = self._level()
+        if level is None:
+            self.loader.setWanted(set())
+            painter.end()
+            return
+
+        keys = self._visibleTiles(level)
+        self.loader.setWanted(keys)
+
+        # draw the loaded tiles over the reduced image and request the others
+        span = VIEWER_TILE_SIZE * 2**level
+        for key in keys:
+            with self.tiles_lock:
+                tile = self.tiles.get(key)
+                if tile is not None:
+                    self.tiles.move_to_end(key)
+
+            if tile is None:
+                if key not in self.requested:
+                    self.requested.add(key)
+                    self.request_tile.emit(key)
+                continue
+
+            _, column, row = key
+            painter.drawImage(
+                QRectF(
+                    image_rect.left() + column * span * self.zoom,
+                    image_rect.top() + row * span * self.zoom,
+                    tile.width() * 2**level * self.zoom,
+                    tile.height() * 2**level * self.zoom,
+                ),
+                tile,
+            )
+
+        # tiles that were skipped by the loader can be requested again
+        self.requested.intersection_update(keys)
+        painter.end()
+
+    def wheelEvent(self, event):
+        # zoom around the mouse position
+        position = event.position()
+        anchor = self._toImage(position)
+
+        fit_zoom = min(
+            self.width() / self.image_width, self.height() / self.image_height
+        )
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        self.zoom = min(max(self.zoom * factor, fit_zoom / 2), 8.0)
+
+        self.center = QPointF(
+            anchor.x() - (position.x() - self.width() / 2) / self.zoom,
+            anchor.y() - (position.y() - self.height() / 2) / self.zoom,
+        )
+        self.update()
+
+    def mousePressEvent(self, event):
+        self.drag_position = event.position()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self.drag_position is None:
+            return super().mouseMoveEvent(event)
+
+        # pan the image with the mouse
+        delta = event.position() - self.drag_position
+        self.drag_position = event.position()
+        self.center -= delta / self.zoom
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        self.drag_position = None
+        super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        self.fit()
@@ -39,6 +39,9 @@ class VideoInfoTable(QTableWidget):
 
         # get the current frame number for updating the slider form the video engine
         self.video_engine.emit_new_frame_index.connect(self.update_info)
+        self.video_engine.emit_crop_values.connect(
+            lambda *_: self.update_info(self.video_engine.getVideoReaderPosition())
+        )
 
         self.update_info()
 
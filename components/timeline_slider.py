@@ -0,0 +1,61 @@
+from PySide6.QtWidgets import QSlider, QStyle, QStyleOptionSlider
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QPainter, QColor
+
+
+class TimelineSlider(QSlider):
+    """
+    Horizontal slider that highlights the marked export ranges on its groove.
+    Methods:
+        setRanges(ranges): Sets the ranges to highlight.
+    """
+
+    def __init__(self, parent=None) -> None:
+        """
+        Set up the slider.
+        Args:
+            parent: Parent widget for this component.
+        """
+
+        super().__init__(Qt.Horizontal, parent)
+
+        self.ranges = []
+
+    def setRanges(self, ranges: list[tuple[int, int]]) -> None:
+        """
+        Sets the ranges to highlight.
+        Args:
+            ranges (list[tuple[int, int]]): The (in, out) frame numbers, both inclusive.
+        """
+
+        self.ranges = ranges
+        self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+
+        span = self.maximum() - self.minimum()
+        if not self.ranges or span <= 0:
+            return
+
+        # get the groove to draw the ranges on
+        option = QStyleOptionSlider()
+        self.initStyleOption(option)
+        groove = self.style().subControlRect(
+            QStyle.CC_Slider, option, QStyle.SC_SliderGroove, self
+        )
+
+        painter = QPainter(self)
+        for start, end in self.ranges:
+            # the slider values are the frame numbers +1, like the video engine position
+            x_start = (
+                groove.left() + groove.width() * (start + 1 - self.minimum()) / span
+            )
+            x_end = groove.left() + groove.width() * (end + 1 - self.minimum()) / span
+            painter.fillRect(
+                QRectF(
+                    x_start, groove.top(), max(1.0, x_end - x_start), groove.height()
+                ),
+                QColor(0, 120, 215, 160),
+            )
+        painter.end()
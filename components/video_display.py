@@ -0,0 +1,287 @@
+from PySide6.QtWidgets import QLabel
+from PySide6.QtCore import Qt, QRectF, Signal
+from PySide6.QtGui import QPainter, QColor, QPen, QImage, QPixmap
+
+from modules.video_engine import VideoEngine
+
+
+class VideoDisplay(QLabel):
+    """
+    Shows the video frames and lets the user drag the crop edges directly on
+    the uncropped frame while the video engine is in crop editing mode.
+    Dragging only repaints the crop overlay, no frame is decoded or converted.
+    The regions of interest are outlined on the cropped frame.
+    Methods:
+        setFrame(frame): Shows an RGB frame scaled to the display.
+        frameRect(): Gets the area of the displayed frame.
+        cropRect(frame_rect): Gets the area of the crop on the displayed frame.
+    """
+
+    # distance in pixels to grab a crop edge
+    HANDLE_DISTANCE = 8
+
+    # emiter for the display size, queued into the engine thread, so the GUI
+    # never decodes when the preview scale changes
+    request_display_size = Signal(int, int)
+
+    # emiter for the dragged crop values, queued into the engine thread, because
+    # a new crop can change the preview scale and decode the active frame again
+    request_crop_values = Signal(int, int, int, int)
+
+    def __init__(self, video_engine: VideoEngine, parent=None) -> None:
+        """
+        Set up the display.
+        Args:
+            video_engine (VideoEngine): The video engine instance to edit the crop of.
+            parent: Parent widget for this component.
+        """
+
+        super().__init__("Video", parent)
+
+        self.video_engine = video_engine
+        self.drag_edge = None
+
+        # get mouse moves without a pressed button to show the resize cursor
+        self.setMouseTracking(True)
+
+        # repaint the overlay when the crop or the regions are changed somewhere else
+        self.video_engine.emit_crop_values.connect(lambda *_: self.update())
+        self.video_engine.emit_regions.connect(lambda *_: self.update())
+
+        self.request_display_size.connect(self.video_engine.setDisplaySize)
+        self.request_crop_values.connect(self.video_engine.updateCropValues)
+
+    def setFrame(self, frame) -> None:
+        """
+        Shows an RGB frame scaled to the display.
+        Args:
+            frame (cv2.Mat): The RGB frame to show.
+        """
+
+        h, w, ch = frame.shape
+        bytes_per_line = ch * w
+
+        # display the frame
+        qt_image = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
+        self.setPixmap(
+            QPixmap.fromImage(qt_image).scaled(
+                self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
+            )
+        )
+
+    def frameRect(self) -> None | QRectF:
+        """
+        Gets the area of the displayed frame.
+
+        Returns:
+            QRectF: The area of the centered pixmap, or None if there is no frame.
+        """
+
+        pixmap = self.pixmap()
+        if pixmap is None or pixmap.isNull():
+            return None
+
+        return QRectF(
+            (self.width() - pixmap.width()) / 2,
+            (self.height() - pixmap.height()) / 2,
+            pixmap.width(),
+            pixmap.height(),
+        )
+
+    def cropRect(self, frame_rect: QRectF) -> QRectF:
+        """
+        Gets the area of the crop on the displayed frame.
+
+        Args:
+            frame_rect (QRectF): The area of the displayed frame.
+
+        Returns:
+            QRectF: The area that is kept by the crop.
+        """
+
+        scale = frame_rect.width() / self.video_engine.width
+        left, right, top, bottom = self.video_engine.getCropValues()
+
+        return QRectF(
+            frame_rect.left() + left * scale,
+            frame_rect.top() + top * scale,
+            (self.video_engine.width - left - right) * scale,
+            (self.video_engine.height - top - bottom) * scale,
+        )
+
+    def _edgeAt(self, x: float, y: float) -> None | str:
+        """
+        Helper function to find the crop edge under the mouse.
+        """
+
+        frame_rect = self.frameRect()
+        if frame_rect is None:
+            return None
+
+        crop = self.cropRect(frame_rect)
+        d = self.HANDLE_DISTANCE
+
+        within_x = crop.left() - d <= x <= crop.right() + d
+        within_y = crop.top() - d <= y <= crop.bottom() + d
+
+        if within_y and abs(x - crop.left()) <= d:
+            return "left"
+        if within_y and abs(x - crop.right()) <= d:
+            return "right"
+        if within_x and abs(y - crop.top()) <= d:
+            return "top"
+        if within_x and abs(y - crop.bottom()) <= d:
+            return "bottom"
+        return None
+
+    #
+    # -------------------------------- EVENTS --------------------------------------
+    #
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+
+        if not self.video_engine.crop_editing:
+            self._paintRegions()
+            return
+
+        frame_rect = self.frameRect()
+        if frame_rect is None:
+            return
+
+        crop = self.cropRect(frame_rect)
+        painter = QPainter(self)
+
+        # darken the area that gets cropped away
+        shade = QColor(0, 0, 0, 140)
+        painter.fillRect(
+            QRectF(
+                frame_rect.left(),
+                frame_rect.top(),
+                frame_rect.width(),
+                crop.top() - frame_rect.top(),
+            ),
+            shade,
+        )
+        painter.fillRect(
+            QRectF(
+                frame_rect.left(),
+                crop.bottom(),
+                frame_rect.width(),
+                frame_rect.bottom() - crop.bottom(),
+            ),
+            shade,
+        )
+        painter.fillRect(
+            QRectF(
+                frame_rect.left(),
+                crop.top(),
+                crop.left() - frame_rect.left(),
+                crop.height(),
+            ),
+            shade,
+        )
+        painter.fillRect(
+            QRectF(
+                crop.right(),
+                crop.top(),
+                frame_rect.right() - crop.right(),
+                crop.height(),
+            ),
+            shade,
+        )
+
+        painter.setPen(QPen(QColor(0, 120, 215), 2))
+        painter.drawRect(crop)
+        painter.end()
+
+    def _paintRegions(self) -> None:
+        """
+        Helper function to outline the regions of interest on the cropped frame.
+        """
+
+        regions = self.video_engine.getRegions()
+        frame_rect = self.frameRect()
+        if not regions or frame_rect is None:
+            return
+
+        # the outlines only match while the pipeline keeps the layout of the frame
+        operations = self.video_engine.pipeline.getOperations()
+        if any(op["op"] in ("rotate", "flip", "letterbox") for op in operations):
+            return
+
+        left, right, top, bottom = self.video_engine.getCropValues()
+        scale_x = frame_rect.width() / max(1, self.video_engine.width - left - right)
+        scale_y = frame_rect.height() / max(1, self.video_engine.height - top - bottom)
+
+        painter = QPainter(self)
+        painter.setPen(QPen(QColor(0, 200, 120), 1))
+        for name, x, y, width, height in regions:
+            rect = QRectF(
+                frame_rect.left() + x * scale_x,
+                frame_rect.top() + y * scale_y,
+                width * scale_x,
+                height * scale_y,
+            ).intersected(frame_rect)
+            painter.drawRect(rect)
+            painter.drawText(rect.adjusted(3, 2, 0, 0), name)
+        painter.end()
+
+    def resizeEvent(self, event):
+        # decode previews at a resolution that fits the display
+        ratio = self.devicePixelRatioF()
+        self.request_display_size.emit(
+            int(event.size().width() * ratio), int(event.size().height() * ratio)
+        )
+        super().resizeEvent(event)
+
+    def mousePressEvent(self, event):
+        if self.video_engine.crop_editing:
+            position = event.position()
+            self.drag_edge = self._edgeAt(position.x(), position.y())
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if not self.video_engine.crop_editing:
+            return super().mouseMoveEvent(event)
+
+        position = event.position()
+
+        # only show the resize cursor when not dragging
+        if self.drag_edge is None:
+            edge = self._edgeAt(position.x(), position.y())
+            if edge in ("left", "right"):
+                self.setCursor(Qt.SizeHorCursor)
+            elif edge in ("top", "bottom"):
+                self.setCursor(Qt.SizeVerCursor)
+            else:
+                self.unsetCursor()
+            return
+
+        frame_rect = self.frameRect()
+        if frame_rect is None:
+            return
+
+        # map the mouse position to frame pixels
+        scale = frame_rect.width() / self.video_engine.width
+        x = round((position.x() - frame_rect.left()) / scale)
+        y = round((position.y() - frame_rect.top()) / scale)
+        width = self.video_engine.width
+        height = self.video_engine.height
+        left, right, top, bottom = self.video_engine.getCropValues()
+
+        # keep at least one pixel of the frame
+        if self.drag_edge == "left":
+            left = min(max(x, 0), width - right - 1)
+        elif self.drag_edge == "right":
+            right = min(max(width - x, 0), width - left - 1)
+        elif self.drag_edge == "top":
+            top = min(max(y, 0), height - bottom - 1)
+        elif self.drag_edge == "bottom":
+            bottom = min(max(height - y, 0), height - top - 1)
+
+        self.request_crop_values.emit(left, right, top, bottom)
+
+    def mouseReleaseEvent(self, event):
+        self.drag_edge = None
+        super().mouseReleaseEvent(event)
@@ -6,13 +6,45 @@ from PySide6.QtWidgets import (
     QPushButton,
     QHBoxLayout,
     QLabel,
+    QComboBox,
+    QListWidget,
+    QFileDialog,
+    QSpinBox,
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal
+import cv2
+import json
 
 from modules.video_engine import VideoEngine
+from modules.preprocessing import Pipeline
+from modules.regions import validateRegions
+
+# parameters filled in when an operation is selected
+OPERATION_TEMPLATES = {
+    "resize": {"width": 640, "height": 480},
+    "rotate": {"angle": 90},
+    "flip": {"direction": "horizontal"},
+    "letterbox": {"width": 640, "height": 640, "value": 114},
+    "color": {"space": "rgb"},
+    "normalize": {
+        "mean": [0.485, 0.456, 0.406],
+        "std": [0.229, 0.224, 0.225],
+        "scale": 1 / 255,
+    },
+}
 
 
 class VideoEditor(QWidget):
+    # emiter for the crop values, queued into the engine thread, because a new
+    # crop can change the preview scale and decode the active frame again
+    request_crop_values = Signal(int, int, int, int)
+
+    # emiters for the pipeline, the regions and the tiling, queued into the
+    # engine thread, because a new pipeline prepares the active frame again
+    request_pipeline = Signal(object)
+    request_regions = Signal(object)
+    request_tiling = Signal(int, int, int, int)
+
     def __init__(self, video_engine: VideoEngine, parent=None):
         super().__init__(parent)
 
@@ -20,6 +52,11 @@ class VideoEditor(QWidget):
 
         self.video_engine = video_engine
 
+        # the editor is the only one changing the pipeline and the regions, so
+        # its copies are current while the queued requests are pending
+        self.pipeline = Pipeline(self.video_engine.pipeline.getOperations())
+        self.regions = list(self.video_engine.regions)
+
         crop_values = self.video_engine.getCropValues()
 
         # form layout for each crop value
@@ -39,13 +76,228 @@ class VideoEditor(QWidget):
         button_layout = QHBoxLayout()
         apply_btn = QPushButton("Apply")
         apply_btn.clicked.connect(self.applyChanges)
+        self.request_crop_values.connect(self.video_engine.updateCropValues)
         button_layout.addWidget(apply_btn)
+
+        # drag the crop edges directly on the video
+        edit_btn = QPushButton("Edit On Video")
+        edit_btn.setCheckable(True)
+        edit_btn.toggled.connect(self.video_engine.setCropEditing)
+        button_layout.addWidget(edit_btn)
         layout.addLayout(button_layout)
 
+        # keep the fields in sync when the crop is dragged on the video
+        self.video_engine.emit_crop_values.connect(self.updateFields)
+
+        # ---------------- Preprocessing -----------------------
+        layout.addWidget(QLabel("Preprocessing:"))
+
+        operation_layout = QHBoxLayout()
+        self.operation_select = QComboBox()
+        self.operation_select.addItems(list(OPERATION_TEMPLATES))
+        self.operation_select.currentTextChanged.connect(self.selectOperation)
+        operation_layout.addWidget(self.operation_select)
+
+        # the parameters of the operation as json
+        self.operation_params = QLineEdit()
+        operation_layout.addWidget(self.operation_params)
+        self.selectOperation(self.operation_select.currentText())
+
+        add_btn = QPushButton("Add")
+        add_btn.clicked.connect(self.addOperation)
+        operation_layout.addWidget(add_btn)
+        layout.addLayout(operation_layout)
+
+        self.operation_list = QListWidget()
+        layout.addWidget(self.operation_list)
+
+        pipeline_layout = QHBoxLayout()
+        remove_btn = QPushButton("Remove")
+        remove_btn.clicked.connect(self.removeOperation)
+        pipeline_layout.addWidget(remove_btn)
+
+        save_btn = QPushButton("Save Pipeline")
+        save_btn.clicked.connect(self.savePipeline)
+        pipeline_layout.addWidget(save_btn)
+
+        load_btn = QPushButton("Load Pipeline")
+        load_btn.clicked.connect(self.loadPipeline)
+        pipeline_layout.addWidget(load_btn)
+        layout.addLayout(pipeline_layout)
+
+        self.pipeline_status = QLabel("")
+        self.pipeline_status.setStyleSheet("color: white")
+        layout.addWidget(self.pipeline_status)
+
+        # ---------------- Regions -----------------------
+        layout.addWidget(QLabel("Regions:"))
+
+        # a named region on the cropped frame
+        region_layout = QHBoxLayout()
+        self.region_name = QLineEdit()
+        self.region_name.setPlaceholderText("name")
+        region_layout.addWidget(self.region_name)
+
+        self.region_values = []
+        for label in ("x", "y", "w", "h"):
+            spin_box = QSpinBox()
+            spin_box.setRange(0, 100000)
+            spin_box.setPrefix(f"{label} ")
+            region_layout.addWidget(spin_box)
+            self.region_values.append(spin_box)
+
+        add_region_btn = QPushButton("Add")
+        add_region_btn.clicked.connect(self.addRegion)
+        region_layout.addWidget(add_region_btn)
+        layout.addLayout(region_layout)
+
+        self.region_list = QListWidget()
+        layout.addWidget(self.region_list)
+
+        remove_region_btn = QPushButton("Remove")
+        remove_region_btn.clicked.connect(self.removeRegion)
+        layout.addWidget(remove_region_btn)
+
+        # a grid of tiles over the cropped frame, a tile width of 0 turns it off
+        tiling_layout = QHBoxLayout()
+        self.tiling_values = []
+        for label in ("Tile w", "Tile h", "Stride x", "Stride y"):
+            spin_box = QSpinBox()
+            spin_box.setRange(0, 100000)
+            spin_box.setPrefix(f"{label} ")
+            tiling_layout.addWidget(spin_box)
+            self.tiling_values.append(spin_box)
+
+        tiling_btn = QPushButton("Apply Tiling")
+        tiling_btn.clicked.connect(self.applyTiling)
+        tiling_layout.addWidget(tiling_btn)
+        layout.addLayout(tiling_layout)
+
+        self.region_status = QLabel("")
+        self.region_status.setStyleSheet("color: white")
+        layout.addWidget(self.region_status)
+
+        self.request_pipeline.connect(self.video_engine.setPipeline)
+        self.request_regions.connect(self.video_engine.setRegions)
+        self.request_tiling.connect(self.video_engine.setTiling)
+        self.video_engine.emit_regions.connect(self.updateRegionStatus)
+
+        layout.addStretch()
+
+    def updateFields(self, left: int, right: int, top: int, bottom: int):
+        self.crop_left.setText(str(left))
+        self.crop_right.setText(str(right))
+        self.crop_top.setText(str(top))
+        self.crop_bottom.setText(str(bottom))
+
     def applyChanges(self):
-        self.video_engine.updateCropValues(
+        self.request_crop_values.emit(
             int(self.crop_left.text()),
             int(self.crop_right.text()),
             int(self.crop_top.text()),
             int(self.crop_bottom.text()),
         )
+
+    def selectOperation(self, name: str):
+        self.operation_params.setText(json.dumps(OPERATION_TEMPLATES[name]))
+
+    def addOperation(self):
+        try:
+            params = json.loads(self.operation_params.text())
+            pipeline = Pipeline(self.pipeline.getOperations())
+            pipeline.addOperation(self.operation_select.currentText(), **params)
+        except (ValueError, TypeError) as error:
+            self.pipeline_status.setText(str(error))
+            return
+
+        self.setPipeline(pipeline)
+
+    def removeOperation(self):
+        row = self.operation_list.currentRow()
+        if row < 0:
+            return
+
+        pipeline = Pipeline(self.pipeline.getOperations())
+        pipeline.removeOperation(row)
+        self.setPipeline(pipeline)
+
+    def savePipeline(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Pipeline", "", "Pipeline Files (*.json)"
+        )
+        if path:
+            self.pipeline.save(path)
+
+    def loadPipeline(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Load Pipeline", "", "Pipeline Files (*.json)"
+        )
+        if not path:
+            return
+
+        try:
+            pipeline = Pipeline.load(path)
+        except (ValueError, TypeError, KeyError) as error:
+            self.pipeline_status.setText(str(error))
+            return
+
+        self.setPipeline(pipeline)
+
+    def setPipeline(self, pipeline: Pipeline):
+        # try the pipeline on the current frame, so a broken chain is shown
+        # here and not raised in the video engine
+        frame = self.video_engine.active_frame
+        if frame is not None:
+            try:
+                pipeline.apply(frame)
+            except (ValueError, cv2.error) as error:
+                self.pipeline_status.setText(str(error))
+                return
+
+        self.pipeline_status.setText("")
+        self.operation_list.clear()
+        for operation in pipeline.getOperations():
+            self.operation_list.addItem(json.dumps(operation))
+
+        self.pipeline = pipeline
+        self.request_pipeline.emit(pipeline)
+
+    def addRegion(self):
+        x, y, width, height = (spin_box.value() for spin_box in self.region_values)
+        self.setRegions(self.regions + [(self.region_name.text(), x, y, width, height)])
+
+    def removeRegion(self):
+        row = self.region_list.currentRow()
+        if row < 0:
+            return
+
+        regions = list(self.regions)
+        del regions[row]
+        self.setRegions(regions)
+
+    def setRegions(self, regions: list):
+        # check the regions here, so a wrong region is shown here and not
+        # raised in the video engine
+        try:
+            regions = validateRegions(regions)
+        except ValueError as error:
+            self.region_status.setText(str(error))
+            return
+
+        self.regions = regions
+        self.request_regions.emit(regions)
+
+        self.region_list.clear()
+        for name, x, y, width, height in regions:
+            self.region_list.addItem(f"{name}: {x}, {y}, {width} x {height}")
+
+    def applyTiling(self):
+        self.request_tiling.emit(*(spin_box.value() for spin_box in self.tiling_values))
+
+    def updateRegionStatus(self, regions: list):
+        if regions:
+            self.region_status.setText(
+                f"{len(regions)} regions are saved per frame, decoded once"
+            )
+        else:
+            self.region_status.setText("")
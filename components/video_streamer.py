@@ -4,14 +4,13 @@ from PySide6.QtWidgets import (
     QWidget,
     QHBoxLayout,
     QVBoxLayout,
-    QLabel,
-    QSlider,
     QPushButton,
     QSizePolicy,
 )
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QImage, QPixmap
 from configs.globals import SLIDER_UPDATE_INTERVAL
+from components.timeline_slider import TimelineSlider
+from components.video_display import VideoDisplay
 
 
 class VideoStreamer(QWidget):
@@ -23,7 +22,7 @@ class VideoStreamer(QWidget):
         updateFrame(): Updates the displayed video frame.
         slided(value): Handles slider movement to change the video frame.
         lock(state): Locks or unlocks the control buttons based on playback state.
-        play(): Toggles playback state between play and pause.
+        stream(reverse): Toggles playback state between play and pause.
     """
 
     def __init__(self, video_engine: VideoEngine) -> None:
@@ -41,7 +40,7 @@ class VideoStreamer(QWidget):
         layout = QVBoxLayout()
 
         # Video Frame
-        self.video_display = QLabel("Video")
+        self.video_display = VideoDisplay(self.video_engine)
         self.video_display.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
         self.video_display.setStyleSheet(
             "background-color: #444; border: 1px solid #666;"
@@ -53,8 +52,9 @@ class VideoStreamer(QWidget):
         self.video_engine.emit_new_frame.connect(self.updateFrame)
 
         # Slider
-        self.slider = QSlider(Qt.Horizontal)
+        self.slider = TimelineSlider()
         self.slider.setRange(0, self.video_engine.max_frames)
+        self.video_engine.emit_export_ranges.connect(self.slider.setRanges)
         self.slider.sliderReleased.connect(self.slided)
         layout.addWidget(self.slider)
 
@@ -91,12 +91,19 @@ class VideoStreamer(QWidget):
         bt_neg1.clicked.connect(lambda: self.changeFrame(-1))
         self.control_layout.addWidget(bt_neg1)
 
+        # the reverse play / pause button
+        self.bt_reverse = QPushButton("Reverse")
+        self.bt_reverse.setObjectName("ReverseButton")
+        self.bt_reverse.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.bt_reverse.clicked.connect(lambda: self.stream(reverse=True))
+        self.control_layout.addWidget(self.bt_reverse)
+
         # the play / pause button
-        bt_play = QPushButton("Play")
-        bt_play.setObjectName("PlayButton")
-        bt_play.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-        bt_play.clicked.connect(self.stream)
-        self.control_layout.addWidget(bt_play)
+        self.bt_play = QPushButton("Play")
+        self.bt_play.setObjectName("PlayButton")
+        self.bt_play.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.bt_play.clicked.connect(lambda: self.stream())
+        self.control_layout.addWidget(self.bt_play)
 
         # change by +1 Frame
         bt_plus1 = QPushButton("+1")
@@ -151,16 +158,7 @@ class VideoStreamer(QWidget):
         Update the frame in the video display.
         """
 
-        h, w, ch = frame.shape
-        bytes_per_line = ch * w
-
-        # display the frame
-        qt_image = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        self.video_display.setPixmap(
-            QPixmap.fromImage(qt_image).scaled(
-                self.video_display.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
-        )
+        self.video_display.setFrame(frame)
 
     def slided(self) -> None:
         """
@@ -196,38 +194,41 @@ class VideoStreamer(QWidget):
         # get all buttons in the control_layout
         for i in range(self.control_layout.count()):
             widget = self.control_layout.itemAt(i).widget()
-            # if the is the PlayButton
-            if widget.objectName() == "PlayButton":
+            # if the is the PlayButton or the ReverseButton
+            if widget.objectName() in ("PlayButton", "ReverseButton"):
                 continue
 
             # enable / disable the button
             widget.setEnabled(not state)
 
-    def stream(self) -> None:
+    def stream(self, reverse: bool = False) -> None:
         """
         Play / Pause the video.
         Args:
-            state (bool): The state of the look.
+            reverse (bool): Play the video backwards.
         """
 
-        # get the PlayButton
-        button = self.control_layout.itemAt(4).widget()  # Play button
-
-        # if it says: "Play", so the video is stopped
-        if button.text() == "Play":
-            # lock the skip buttons
-            self.lock(True)
-            # change the text on the button
-            button.setText("Pause")
-
-            self.video_engine.play(True)
+        # get the button that was pressed and the other play button
+        button = self.bt_reverse if reverse else self.bt_play
+        other = self.bt_play if reverse else self.bt_reverse
 
-        # if it says: "Pause", stop  the video
-        else:
+        # if it says: "Pause", the video is playing, so stop it
+        if button.text() == "Pause":
             # unlock the skip buttons
             self.lock(False)
 
-            # set the button back to play
-            button.setText("Play")
+            # set the buttons back
+            button.setText("Reverse" if reverse else "Play")
+            other.setEnabled(True)
 
             self.video_engine.play(False)
+
+        # otherwise the video is stopped
+        else:
+            # lock the skip buttons and the other direction
+            self.lock(True)
+            other.setEnabled(False)
+            # change the text on the button
+            button.setText("Pause")
+
+            self.video_engine.play(True, reverse=reverse)
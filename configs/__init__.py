@@ -1 +1,22 @@
-from .globals import APP_TITLE, SLIDER_UPDATE_INTERVAL
+from .globals import (
+    APP_TITLE,
+    SLIDER_UPDATE_INTERVAL,
+    FRAME_BUFFER_SIZE,
+    FORWARD_DECODE_LIMIT,
+    EXPORT_SEGMENT_LENGTH,
+    EXPORT_WORKERS,
+    SAMPLER_WORKERS,
+    SAMPLER_PREFETCH,
+    QUALITY_STRIDE,
+    MEMORY_BUDGET_MB,
+    PREVIEW_MAX_DOWNSCALE,
+    VIEWER_TILE_SIZE,
+    VIEWER_TILE_CACHE_SIZE,
+    VIEWER_PREVIEW_SIZE,
+    SYNC_STATS_INTERVAL,
+    SYNC_REQUEST_TIMEOUT,
+    REGION_WRITERS,
+    DECODER_MODE,
+    DECODER_RING_SLOTS,
+    DECODER_TIMEOUT,
+)
@@ -1,2 +1,20 @@
 APP_TITLE = "VFeed - Video Frame Extraction and Editing for Deep-learning"
 SLIDER_UPDATE_INTERVAL = 0.1  # seconds
+FRAME_BUFFER_SIZE = 32  # decoded frames kept behind the playhead
+FORWARD_DECODE_LIMIT = 60  # frames decoded sequentially before seeking instead
+EXPORT_SEGMENT_LENGTH = 300  # frames per export job, aligned to this grid
+EXPORT_WORKERS = None  # export processes, None uses all cpu cores
+SAMPLER_WORKERS = 4  # threads decoding batches for the frame sampler
+SAMPLER_PREFETCH = 2  # batches decoded ahead by the frame sampler
+QUALITY_STRIDE = 10  # every Nth frame is scored for quality weighted sampling
+MEMORY_BUDGET_MB = 2048  # shared by all frame buffers, caches and queues
+PREVIEW_MAX_DOWNSCALE = 8  # preview frames are at most this much smaller
+VIEWER_TILE_SIZE = 512  # pixels per side of a full image viewer tile
+VIEWER_TILE_CACHE_SIZE = 64  # tiles kept by the full image viewer
+VIEWER_PREVIEW_SIZE = 1024  # longest side of the first, reduced image
+SYNC_STATS_INTERVAL = 0.5  # seconds between sync stats updates while playing
+SYNC_REQUEST_TIMEOUT = 1.0  # seconds before an unanswered frame request is dropped
+REGION_WRITERS = 4  # threads encoding the region patches of an export worker
+DECODER_MODE = "thread"  # "thread" or "process" to decode outside of the GUI process
+DECODER_RING_SLOTS = 8  # frame slots in the shared memory ring of the decoder process
+DECODER_TIMEOUT = 5.0  # seconds before an unanswered decoder process is restarted
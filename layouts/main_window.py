@@ -16,7 +16,9 @@ from components.video_streamer import VideoStreamer
 from components.info_table import VideoInfoTable
 from components.image_extractor import ImageExtractor
 from components.video_editor import VideoEditor
+from components.compare_view import CompareView
 from modules.video_engine import VideoEngine
+from modules.sync_controller import SyncController
 
 
 class MainWindow(QMainWindow):
@@ -34,6 +36,12 @@ class MainWindow(QMainWindow):
         self.open_button.clicked.connect(self.selectAndBuild)
         self.main_layout.addWidget(self.open_button, alignment=Qt.AlignCenter)
 
+        # select two or more videos to play them side by side
+        self.compare_button = QPushButton("Compare Videos")
+        self.compare_button.setFixedSize(150, 40)
+        self.compare_button.clicked.connect(self.selectAndCompare)
+        self.main_layout.addWidget(self.compare_button, alignment=Qt.AlignCenter)
+
         # add the layout to the central widget
         self.central_widget.setLayout(self.main_layout)
         self.setCentralWidget(self.central_widget)
@@ -53,11 +61,52 @@ class MainWindow(QMainWindow):
         Override the closeEvent from the MainWindow
         """
 
-        self.video_engine.stop()
-        self.video_engine_thread.quit()
-        self.video_engine_thread.wait()
+        if hasattr(self, "sync_controller"):
+            self.sync_controller.stop()
+
+        if hasattr(self, "video_engine"):
+            self.image_extractor.stop()
+            self.video_engine.stop()
+            self.video_engine_thread.quit()
+            self.video_engine_thread.wait()
         event.accept()
 
+    def removeStartButtons(self) -> None:
+        """
+        Removes the open and compare buttons from the layout.
+        """
+
+        for button in (self.open_button, self.compare_button):
+            self.main_layout.removeWidget(button)
+            button.setParent(None)
+            button.deleteLater()
+
+    def selectAndCompare(self) -> None:
+        """
+        Opens a file dialog to select two or more video files and loads the
+        side by side compare layout.
+        """
+
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Select Video Files",
+            "",
+            "Video Files (*.mp4 *.avi *.mov *.mkv);;All Files (*)",
+        )
+
+        # a comparison needs at least two videos
+        if len(file_paths) < 2:
+            return
+
+        self.removeStartButtons()
+
+        # every video is decoded in its own thread, driven by one clock
+        self.sync_controller = SyncController(file_paths)
+        self.main_layout.addWidget(CompareView(self.sync_controller))
+
+        # show the first frames after the layout is built
+        self.sync_controller.initialize()
+
     def selectAndBuild(self) -> None:
         """
         Opens a file dialog to select a video file and loads the main layout.
@@ -70,10 +119,8 @@ class MainWindow(QMainWindow):
             "Video Files (*.mp4 *.avi *.mov *.mkv);;All Files (*)",
         )
 
-        # remove the open button from the layout
-        self.main_layout.removeWidget(self.open_button)
-        self.open_button.setParent(None)
-        self.open_button.deleteLater()
+        # remove the start buttons from the layout
+        self.removeStartButtons()
 
         # create a thread for the video engine
         self.video_engine_thread = QThread()
@@ -114,7 +161,8 @@ class MainWindow(QMainWindow):
         # Second tab for Image Extracotr
         tab2 = QWidget()
         layout2 = QVBoxLayout()
-        layout2.addWidget(ImageExtractor(self.video_engine))
+        self.image_extractor = ImageExtractor(self.video_engine)
+        layout2.addWidget(self.image_extractor)
         tab2.setLayout(layout2)
 
         # Add tabs
@@ -1,3 +1,37 @@
-from .video_engine import VideoEngine
+import importlib
 
-__all__ = ["VideoEngine"]
+from .frame_buffer import FrameBuffer
+from .frame_reader import FrameReader
+from .decoder_process import ProcessFrameReader
+from .frame_sampler import FrameSampler
+from .preprocessing import Pipeline
+from .memory_budget import MemoryBudget, memory_budget
+
+# the Qt adapters are imported on first access, so the Qt-free core and the
+# spawned worker processes import without PySide6
+_QT_ADAPTERS = {
+    "VideoEngine": ".video_engine",
+    "FrameExporter": ".frame_exporter",
+    "SyncController": ".sync_controller",
+}
+
+
+def __getattr__(name: str):
+    if name not in _QT_ADAPTERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return getattr(importlib.import_module(_QT_ADAPTERS[name], __name__), name)
+
+
+__all__ = [
+    "VideoEngine",
+    "FrameBuffer",
+    "FrameReader",
+    "ProcessFrameReader",
+    "FrameExporter",
+    "FrameSampler",
+    "Pipeline",
+    "MemoryBudget",
+    "memory_budget",
+    "SyncController",
+]
@@ -0,0 +1,533 @@
+import math
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+
+import cv2
+import numpy as np
+
+from configs.globals import DECODER_RING_SLOTS, DECODER_TIMEOUT, FRAME_BUFFER_SIZE
+from modules.frame_buffer import FrameBuffer
+from modules.frame_reader import FrameReader
+from modules.memory_budget import memory_budget
+from modules.preprocessing import Pipeline
+
+
+def decoderMain(
+    path: str,
+    shm_name: str,
+    slots: int,
+    frame_bytes: int,
+    budget: int,
+    connection: Connection,
+) -> None:
+    """
+    Runs the decoder in its own process. Frames are requested over the
+    connection and published into the slot of the shared memory ring the
+    reader chose, the uncropped frame next to the frame prepared for the
+    display, so the cropping, the preprocessing and the RGB conversion run here.
+
+    Commands:
+        ("read", (frame_number, slot)): Decodes a frame into a slot, answered
+            with (frame_number, slot, shape, display_shape), the slot is -1 if
+            it can't be decoded. A display frame larger than a slot is answered
+            with the frame itself instead of its shape.
+        ("scale", scale): Sets the preview scale of the decoded frames.
+        ("crop", crop_values): Sets the left, right, top, and bottom crop values.
+        ("display", (pipeline, crop_editing)): Sets the pipeline as json, and
+            whether the uncropped and unprocessed frame is shown.
+        ("budget", nbytes): Sets the memory budget of the frame buffer.
+        ("stop", None): Stops the decoder.
+
+    Args:
+        path (str): The path to the video file.
+        shm_name (str): The name of the shared memory ring.
+        slots (int): The number of frame slots in the ring.
+        frame_bytes (int): The size of a frame in a slot, a full resolution frame.
+        budget (int): The memory budget of the frame buffer, counted in the reader.
+        connection (Connection): The control channel to the reader.
+    """
+
+    # this process has its own budget, it only holds the share of the reader
+    memory_budget.setLimit(budget)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((slots, 2, frame_bytes), dtype=np.uint8, buffer=shm.buf)
+    reader = FrameReader(path)
+
+    try:
+        while True:
+            try:
+                command, value = connection.recv()
+            except EOFError:
+                break
+
+            if command == "stop":
+                break
+            if command == "scale":
+                reader.setPreviewScale(value)
+                continue
+            if command == "crop":
+                reader.updateCropValues(*value)
+                continue
+            if command == "display":
+                reader.setDisplay(Pipeline.fromJSON(value[0]), value[1])
+                continue
+            if command == "budget":
+                memory_budget.setLimit(value)
+                continue
+
+            # the reader picks the slot, it knows which frames are still shown
+            value, target = value
+            try:
+                frame = reader.seek(value)
+                display = None if frame is None else reader.getDisplayFrame()
+            except (ValueError, cv2.error):
+                # a pipeline that does not fit the frame, like a crop larger
+                # than the frame, is treated like a frame that can't be decoded
+                display = None
+
+            if display is None:
+                connection.send((value, -1, (), ()))
+                continue
+
+            frame = reader.active_raw
+            np.copyto(ring[target, 0, : frame.nbytes].reshape(frame.shape), frame)
+            if display.nbytes > frame_bytes:
+                # a pipeline that enlarges the frame does not fit a slot
+                connection.send((value, target, frame.shape, display))
+                continue
+
+            view = ring[target, 1, : display.nbytes].reshape(display.shape)
+            np.copyto(view, display)
+            connection.send((value, target, frame.shape, display.shape))
+    finally:
+        reader.release()
+        del ring
+        shm.close()
+
+
+class ProcessFrameReader(FrameReader):
+    """
+    FrameReader that decodes in a separate process, so decoding, cropping, the
+    preprocessing and the RGB conversion never compete with the GUI for the GIL.
+
+    The decoder publishes every frame uncropped and prepared for the display
+    into a shared memory ring, and the active frame and the display frame are
+    views into that ring, mapped without copying. While a frame is shown, the
+    decoder already decodes the next one in the playing direction into the
+    next slot, which is used again when that frame is not shown. So a view
+    stays valid while the next DECODER_RING_SLOTS - 2 frames are shown, copy a
+    frame to keep it longer. The decoder is restarted when it crashes or stops
+    answering.
+
+    The frame buffer of the decoder gets a share of the memory budget, which
+    is reserved here and shrinks under pressure. The other FrameReader methods
+    decode in this process, they are used to save frames at full resolution.
+
+    Methods:
+        seek(frame_number): Makes a frame the active frame, decoded by the decoder process.
+        getDisplayFrame(): Gets the active frame prepared by the decoder process.
+        setDisplay(pipeline, crop_editing): Sets how the decoder process prepares the frames.
+        updateCropValues(left, right, top, bottom): Updates the crop values for the video.
+        setPreviewScale(scale): Decodes reduced resolution frames for previews.
+        readFull(frame_number): Gets an uncropped frame at full resolution.
+        evict(nbytes): Shrinks the frame buffer of the decoder process.
+        release(): Stops the decoder process and frees the shared memory.
+    """
+
+    def __init__(self, path: str, slots: int = DECODER_RING_SLOTS) -> None:
+        """
+        Opens the video file and starts the decoder process.
+
+        Args:
+            path (str): Path to the video source.
+            slots (int, optional): The number of frame slots in the shared memory ring.
+
+        Attributes:
+            slots (int): The number of frame slots in the ring.
+            frame_bytes (int): The size of a frame in a slot, a full resolution frame.
+            shm (SharedMemory): The shared memory of the ring.
+            ring (np.ndarray): The (slots, 2, frame_bytes) view of the ring, the
+                uncropped frame and the display frame per slot.
+            process (Process): The decoder process.
+            connection (Connection): The control channel to the decoder.
+            slot (int): The slot of the last shown frame.
+            restarts (int): The number of decoder restarts after a crash.
+            active_display (np.ndarray): The display ready RGB active frame, or None.
+            display_valid (bool): False if the settings changed since the display frame.
+            decoder_budget (int): The memory budget of the decoder frame buffer.
+            prefetching (int): The frame number decoded ahead, or None.
+            prefetch_valid (bool): False if the settings changed since the prefetch.
+        """
+
+        super().__init__(path)
+
+        if slots < 2:
+            raise ValueError(f"The ring needs at least two slots: {slots}")
+
+        self.slots = slots
+        self.frame_bytes = self.width * self.height * 3
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=self.slots * 2 * self.frame_bytes
+        )
+        self.ring = np.ndarray(
+            (self.slots, 2, self.frame_bytes), dtype=np.uint8, buffer=self.shm.buf
+        )
+
+        self.process = None
+        self.connection = None
+        self.send_lock = threading.Lock()
+
+        # the ring can't be evicted, but counts against the budget
+        self.decoder_budget = 0
+        memory_budget.register(self, FrameBuffer.PRIORITY)
+        memory_budget.reserve(self, self.slots * 2 * self.frame_bytes)
+
+        # the frame buffer of the decoder gets what is left of the budget, at
+        # least two frames, so both processes together stay within the budget
+        available = memory_budget.limit - memory_budget.getUsage()
+        self.decoder_budget = max(
+            2 * self.frame_bytes, min(FRAME_BUFFER_SIZE * self.frame_bytes, available)
+        )
+        memory_budget.reserve(self, self.decoder_budget)
+
+        self.slot = -1
+        self.restarts = 0
+        self.active_display = None
+        self.display_valid = False
+        self.prefetching = None
+        self.prefetch_valid = False
+        self._startDecoder()
+
+    #
+    # ------------------------------- DECODER -------------------------------
+    #
+
+    def _startDecoder(self) -> None:
+        """
+        Helper function to start the decoder process.
+        """
+
+        # spawn a fresh interpreter, forking a process with Qt threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=decoderMain,
+            args=(
+                self.path,
+                self.shm.name,
+                self.slots,
+                self.frame_bytes,
+                self.decoder_budget,
+                child_connection,
+            ),
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+        self.prefetching = None
+
+        # a restarted decoder continues with the current settings
+        if self.preview_scale < 1:
+            self._send("scale", self.preview_scale)
+        self._send("crop", self.getCropValues())
+        self._send("display", (self.display_pipeline.toJSON(), self.crop_editing))
+
+    def _stopDecoder(self, timeout: float = DECODER_TIMEOUT) -> None:
+        """
+        Helper function to stop the decoder process, killing it if it hangs.
+        """
+
+        if self.process is None:
+            return
+
+        try:
+            self._send("stop", None)
+        except OSError:
+            pass
+
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+        self.connection.close()
+        self.process = None
+        self.prefetching = None
+
+    def _restartDecoder(self) -> None:
+        """
+        Helper function to replace a crashed or hanging decoder process.
+        """
+
+        # a decoder that did not answer in time is not waited for again
+        self.restarts += 1
+        self._stopDecoder(timeout=0)
+        self._startDecoder()
+
+    def _send(self, command: str, value) -> None:
+        """
+        Helper function to send a command to the decoder. The budget may evict
+        from other threads, so the sends are serialized.
+        """
+
+        with self.send_lock:
+            self.connection.send((command, value))
+
+    def _sendSetting(self, command: str, value) -> None:
+        """
+        Helper function to send a setting to the decoder, which invalidates the
+        display frame and the frame decoded ahead.
+        """
+
+        with self.lock:
+            self.display_valid = False
+            self.prefetch_valid = False
+            try:
+                self._send(command, value)
+            except OSError:
+                # the restarted decoder gets the setting on start
+                self._restartDecoder()
+
+    def _receive(self) -> None | tuple:
+        """
+        Helper function to wait for the answer to a read request, restarting
+        the decoder if it crashed or does not answer.
+        """
+
+        try:
+            if not self.connection.poll(DECODER_TIMEOUT):
+                raise TimeoutError("Decoder did not answer")
+            return self.connection.recv()
+        except (EOFError, OSError, TimeoutError):
+            self._restartDecoder()
+            return None
+
+    def _request(self, frame_number: int) -> None:
+        """
+        Helper function to request a frame into the slot after the shown frame.
+        The slot only advances when a frame is shown, so frames decoded ahead
+        and thrown away never overwrite a shown frame.
+        """
+
+        self._send("read", (frame_number, (self.slot + 1) % self.slots))
+
+    def _decode(self, frame_number: int) -> None | tuple:
+        """
+        Helper function to request a frame from the decoder and wait for it.
+        """
+
+        # one retry with a fresh decoder, a frame that crashes the decoder
+        # twice is treated like a frame that can't be decoded
+        for _ in range(2):
+            try:
+                self._request(frame_number)
+            except OSError:
+                self._restartDecoder()
+                continue
+
+            answer = self._receive()
+            if answer is not None:
+                return answer
+        return None
+
+    #
+    # ------------------------------- FRAME ACCESS -------------------------------
+    #
+
+    def setDisplay(self, pipeline: Pipeline, crop_editing: bool) -> None:
+        """
+        Sets how the decoder process prepares the frames for the display.
+
+        Args:
+            pipeline (Pipeline): The preprocessing applied to the cropped frames.
+            crop_editing (bool): True to get the uncropped and unprocessed frames.
+        """
+
+        super().setDisplay(pipeline, crop_editing)
+        self._sendSetting("display", (pipeline.toJSON(), crop_editing))
+
+    def updateCropValues(
+        self, left: int = None, right: int = None, top: int = None, bottom: int = None
+    ) -> None:
+        """
+        Updates the crop values for the video, the decoder process crops the frames.
+
+        Args:
+            left (int, optional): The left crop value.
+            right (int, optional): The right crop value.
+            top (int, optional): The top crop value.
+            bottom (int, optional): The bottom crop value.
+        """
+
+        super().updateCropValues(left, right, top, bottom)
+        self._sendSetting("crop", self.getCropValues())
+
+    def setPreviewScale(self, scale: float) -> bool:
+        """
+        Decodes frames at reduced resolution, for previews that are much smaller
+        than the video. Saving still uses the full resolution.
+
+        Args:
+            scale (float): The scale of the decoded frames, 1.0 for full resolution.
+
+        Returns:
+            bool: True if the scale changed and the buffered frames were dropped.
+        """
+
+        with self.lock:
+            changed = super().setPreviewScale(scale)
+            if changed:
+                self._sendSetting("scale", scale)
+            return changed
+
+    def seek(self, frame_number: int) -> None | np.ndarray:
+        """
+        Makes a frame the active frame, decoded and prepared for the display
+        by the decoder process. The next frame in the same direction is
+        requested right away, so it is decoded while this one is shown.
+
+        Args:
+            frame_number (int): The frame number to show.
+
+        Returns:
+            np.ndarray: The cropped active frame in BGR format, a view into the
+                shared memory ring valid while the next DECODER_RING_SLOTS - 2
+                frames are shown, or None if it can't be decoded.
+        """
+
+        with self.lock:
+            answer = None
+            if self.prefetching is not None:
+                # the decoder answers in order, so the frame decoded ahead is
+                # collected even when another frame is needed
+                prefetched = self._receive()
+                if self.prefetching == frame_number and self.prefetch_valid:
+                    answer = prefetched
+                self.prefetching = None
+
+            if answer is None:
+                answer = self._decode(frame_number)
+            if answer is None:
+                return None
+
+            # the answer holds the shapes of the published frames, or the
+            # display frame itself when it does not fit a slot
+            index, slot, shape, display = answer
+            if index != frame_number or slot == -1:
+                return None
+            if isinstance(display, tuple):
+                display = self.ring[slot, 1, : math.prod(display)].reshape(display)
+
+            step = frame_number - self.active_index
+            self.slot = slot
+            self.active_index = frame_number
+            self.active_raw = self.ring[slot, 0, : math.prod(shape)].reshape(shape)
+            self.active_display = display
+            self.display_valid = True
+
+            # keep one request in flight, the next frame while playing or stepping
+            upcoming = frame_number + (step if step in (-1, 1) else 1)
+            if 0 <= upcoming < self.max_frames:
+                try:
+                    self._request(upcoming)
+                    self.prefetching = upcoming
+                    self.prefetch_valid = True
+                except OSError:
+                    self._restartDecoder()
+
+            return self.active_frame
+
+    def getDisplayFrame(self) -> None | np.ndarray:
+        """
+        Gets the active frame prepared for the display by the decoder process.
+        The active frame is decoded again when a setting changed since.
+
+        Returns:
+            np.ndarray: The cropped and processed active frame in RGB format,
+                uncropped and unprocessed while editing the crop, a view into the
+                shared memory ring valid while the next DECODER_RING_SLOTS - 2
+                frames are shown, or None if there is none.
+        """
+
+        with self.lock:
+            if not self.display_valid and self.active_index >= 0:
+                if self.seek(self.active_index) is None:
+                    return None
+            return self.active_display
+
+    def readFull(self, frame_number: int) -> None | cv2.Mat:
+        """
+        Gets an uncropped frame at full resolution, decoded in this process.
+
+        Args:
+            frame_number (int): The frame number to get.
+
+        Returns:
+            cv2.Mat: The uncropped frame in BGR format, or None if it can't be decoded.
+        """
+
+        with self.lock:
+            # the video source of this process only decodes frames to save, so
+            # the buffer is bypassed
+            self.source.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ret, frame = self.source.read()
+            self.decoder_index = frame_number + 1 if ret else frame_number
+            return frame if ret else None
+
+    def evict(self, nbytes: int) -> int:
+        """
+        Shrinks the frame buffer of the decoder process to free memory. The
+        ring and two frames of the frame buffer are kept.
+
+        Args:
+            nbytes (int): The number of bytes to free.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+
+        with self.send_lock:
+            freed = max(0, min(nbytes, self.decoder_budget - 2 * self.frame_bytes))
+            if freed == 0:
+                return 0
+
+            self.decoder_budget -= freed
+            if self.process is not None:
+                try:
+                    self.connection.send(("budget", self.decoder_budget))
+                except OSError:
+                    # the restarted decoder gets the budget on start
+                    pass
+            return freed
+
+    def release(self) -> None:
+        """
+        Stops the decoder process and frees the shared memory.
+        """
+
+        super().release()
+
+        with self.lock:
+            if self.shm is None:
+                return
+
+            self._stopDecoder()
+            self.active_display = None
+
+            del self.ring
+            try:
+                self.shm.close()
+            except BufferError:
+                # frames still held somewhere keep the mapping alive until
+                # they are dropped, the memory is unlinked anyway
+                pass
+            self.shm.unlink()
+            self.shm = None
+
+        memory_budget.release(
+            self, self.slots * 2 * self.frame_bytes + self.decoder_budget
+        )
+        self.decoder_budget = 0
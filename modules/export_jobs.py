@@ -0,0 +1,236 @@
+import cv2
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from configs.globals import EXPORT_SEGMENT_LENGTH, FORWARD_DECODE_LIMIT, REGION_WRITERS
+from modules.frame_reader import cropFrame
+from modules.preprocessing import Pipeline, writeFrame
+from modules.regions import writeRegions
+
+# the jobs run in spawned worker processes, so this module stays free of Qt
+
+
+def planSegments(
+    ranges: list[tuple[int, int]], step: int
+) -> list[tuple[int, int, int]]:
+    """
+    Splits the export ranges into segments on a fixed frame grid, so every
+    worker seeks once and then decodes its segment sequentially.
+
+    Args:
+        ranges (list[tuple[int, int]]): The (in, out) frame numbers, both inclusive.
+        step (int): Export every Nth frame of each range.
+
+    Returns:
+        list[tuple[int, int, int]]: The (first, last, count) exported frame numbers per segment.
+    """
+
+    if step < 1:
+        raise ValueError(f"Export step must be positive: {step}")
+
+    segments = []
+    for start, end in ranges:
+        first = start
+        while first <= end:
+            # the segment ends at the next grid line or the end of the range
+            boundary = (first // EXPORT_SEGMENT_LENGTH + 1) * EXPORT_SEGMENT_LENGTH
+            last_frame = min(end, boundary - 1)
+
+            # last exported frame within the segment
+            count = (last_frame - first) // step + 1
+            last = first + (count - 1) * step
+            segments.append((first, last, count))
+
+            first = last + step
+
+    return segments
+
+
+def exportSegment(
+    path: str,
+    first: int,
+    last: int,
+    step: int,
+    crop_values: tuple[int, int, int, int],
+    pipeline: str,
+    output_path: str,
+    file_name: str,
+    regions: list[tuple[str, int, int, int, int]] = None,
+) -> int:
+    """
+    Exports every Nth frame of a segment. This runs in a worker process with its
+    own video reader.
+
+    Args:
+        path (str): The path to the video file.
+        first (int): The first frame number to export.
+        last (int): The last frame number to export.
+        step (int): Export every Nth frame.
+        crop_values (tuple[int, int, int, int]): The left, right, top, and bottom crop values.
+        pipeline (str): The serialised preprocessing pipeline.
+        output_path (str): The folder to save the frames to.
+        file_name (str): The name of the video file without extension.
+        regions (list[tuple[str, int, int, int, int]], optional): Save these regions
+            of the cropped frames into one folder each, instead of the whole frames.
+
+    Returns:
+        int: The number of frames saved.
+    """
+
+    source = cv2.VideoCapture(path)
+    if not source.isOpened():
+        raise ValueError(f"Unable to open video file: {path}")
+
+    # the same pipeline as in the preview, compiled once for the segment
+    preprocessing = Pipeline.fromJSON(pipeline)
+    pool = ThreadPoolExecutor(max_workers=REGION_WRITERS) if regions else None
+    pending = []
+    saved = 0
+
+    try:
+        # seek once, the backend decodes from the keyframe before the frame
+        source.set(cv2.CAP_PROP_POS_FRAMES, first)
+
+        for frame_number in range(first, last + 1, step):
+            if frame_number != first:
+                if step > FORWARD_DECODE_LIMIT:
+                    # seeking is cheaper than decoding that many frames
+                    source.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+                else:
+                    # skip frames without converting them
+                    for _ in range(step - 1):
+                        source.grab()
+
+            ret, frame = source.read()
+            if not ret:
+                break
+
+            # the +1 matches the frame numbers of VideoEngine.save
+            pending = _exportFrame(
+                pool,
+                pending,
+                output_path,
+                f"{file_name}_Frame-{frame_number + 1}",
+                cropFrame(frame, crop_values),
+                regions,
+                preprocessing,
+            )
+            saved += 1
+    finally:
+        source.release()
+        _finishWrites(pool, pending)
+
+    return saved
+
+
+def exportGroups(
+    path: str,
+    groups: list[tuple[bool, list[int]]],
+    crop_values: tuple[int, int, int, int],
+    pipeline: str,
+    output_path: str,
+    file_name: str,
+    regions: list[tuple[str, int, int, int, int]] = None,
+) -> tuple[int, int, int]:
+    """
+    Exports the frames of planned seek groups. This runs in a worker process
+    with its own video reader.
+
+    Args:
+        path (str): The path to the video file.
+        groups (list[tuple[bool, list[int]]]): The groups from planSeeks, in order.
+        crop_values (tuple[int, int, int, int]): The left, right, top, and bottom crop values.
+        pipeline (str): The serialised preprocessing pipeline.
+        output_path (str): The folder to save the frames to.
+        file_name (str): The name of the video file without extension.
+        regions (list[tuple[str, int, int, int, int]], optional): Save these regions
+            of the cropped frames into one folder each, instead of the whole frames.
+
+    Returns:
+        tuple[int, int, int]: The number of frames saved, seeks and frames decoded.
+    """
+
+    source = cv2.VideoCapture(path)
+    if not source.isOpened():
+        raise ValueError(f"Unable to open video file: {path}")
+
+    preprocessing = Pipeline.fromJSON(pipeline)
+    pool = ThreadPoolExecutor(max_workers=REGION_WRITERS) if regions else None
+    pending = []
+    saved = seeks = decoded = 0
+    position = 0
+
+    try:
+        for seek, frame_numbers in groups:
+            if seek:
+                source.set(cv2.CAP_PROP_POS_FRAMES, frame_numbers[0])
+                position = frame_numbers[0]
+                seeks += 1
+
+            for frame_number in frame_numbers:
+                # skip the frames in between without converting them
+                while position < frame_number:
+                    source.grab()
+                    position += 1
+                    decoded += 1
+
+                ret, frame = source.read()
+                position += 1
+                decoded += 1
+                if not ret:
+                    return saved, seeks, decoded
+
+                # the +1 matches the frame numbers of VideoEngine.save
+                pending = _exportFrame(
+                    pool,
+                    pending,
+                    output_path,
+                    f"{file_name}_Frame-{frame_number + 1}",
+                    cropFrame(frame, crop_values),
+                    regions,
+                    preprocessing,
+                )
+                saved += 1
+    finally:
+        source.release()
+        _finishWrites(pool, pending)
+
+    return saved, seeks, decoded
+
+
+def _exportFrame(
+    pool: ThreadPoolExecutor,
+    pending: list[Future],
+    output_path: str,
+    file_stem: str,
+    frame: cv2.Mat,
+    regions: list[tuple[str, int, int, int, int]],
+    preprocessing: Pipeline,
+) -> list[Future]:
+    """
+    Helper function to write a cropped frame, or all of its regions in the pool.
+    Returns the pending region writes.
+    """
+
+    if not regions:
+        writeFrame(os.path.join(output_path, file_stem), preprocessing.apply(frame))
+        return []
+
+    # the patches of the previous frame were encoded while this frame was
+    # decoded, wait for them so at most two frames are held
+    for future in pending:
+        future.result()
+    return writeRegions(pool, output_path, file_stem, frame, regions, preprocessing)
+
+
+def _finishWrites(pool: ThreadPoolExecutor, pending: list[Future]) -> None:
+    """
+    Helper function to wait for the last region writes and stop the pool.
+    """
+
+    if pool is None:
+        return
+
+    for future in pending:
+        future.result()
+    pool.shutdown()
@@ -0,0 +1,133 @@
+import threading
+from collections import deque
+
+import cv2
+
+from modules.memory_budget import MemoryBudget, memory_budget
+
+
+class FrameBuffer:
+    """
+    Ring buffer of the most recently decoded frames.
+
+    The buffer always holds a contiguous run of frame indices, so a frame behind
+    the playhead can be served without seeking the video reader. The frames are
+    reserved in the memory budget, which can evict the oldest ones under pressure.
+
+    Methods:
+        push(index, frame): Appends a decoded frame to the buffer.
+        get(index): Gets a buffered frame by its index.
+        evict(nbytes): Drops the oldest frames to free memory.
+        clear(): Removes all frames from the buffer.
+    """
+
+    # buffers are evicted after caches that are cheaper to rebuild
+    PRIORITY = 1
+
+    def __init__(self, capacity: int, budget: MemoryBudget = memory_budget) -> None:
+        """
+        Initializes an empty frame buffer.
+
+        Args:
+            capacity (int): The maximum number of frames kept in the buffer.
+            budget (MemoryBudget, optional): The memory budget to reserve the frames in.
+
+        Attributes:
+            capacity (int): The maximum number of frames kept in the buffer.
+            frames (deque): The buffered (index, frame) pairs, oldest first.
+            budget (MemoryBudget): The memory budget the frames are reserved in.
+        """
+
+        if capacity < 1:
+            raise ValueError(f"Frame buffer capacity must be positive: {capacity}")
+
+        self.capacity = capacity
+        self.frames = deque()
+        self.budget = budget
+        self.lock = threading.Lock()
+
+        if self.budget is not None:
+            self.budget.register(self, self.PRIORITY)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __contains__(self, index: int) -> bool:
+        return self.get(index) is not None
+
+    def push(self, index: int, frame: cv2.Mat) -> None:
+        """
+        Appends a decoded frame to the buffer. The oldest frame is dropped when
+        the buffer is full.
+
+        Args:
+            index (int): The frame number of the decoded frame.
+            frame (cv2.Mat): The decoded frame.
+        """
+
+        with self.lock:
+            freed = 0
+
+            # a frame that does not follow the newest one breaks the contiguous
+            # run, so start over from this frame
+            if self.frames and index != self.frames[-1][0] + 1:
+                freed += sum(buffered.nbytes for _, buffered in self.frames)
+                self.frames.clear()
+
+            self.frames.append((index, frame))
+            while len(self.frames) > self.capacity:
+                freed += self.frames.popleft()[1].nbytes
+
+        # reserve outside of the lock, the budget may evict this buffer
+        if self.budget is not None:
+            self.budget.release(self, freed)
+            self.budget.reserve(self, frame.nbytes)
+
+    def get(self, index: int) -> None | cv2.Mat:
+        """
+        Gets a buffered frame by its index.
+
+        Args:
+            index (int): The frame number to look up.
+
+        Returns:
+            cv2.Mat: The buffered frame, or None if the frame is not buffered.
+        """
+
+        with self.lock:
+            if not self.frames:
+                return None
+
+            first = self.frames[0][0]
+            if first <= index <= self.frames[-1][0]:
+                return self.frames[index - first][1]
+            return None
+
+    def evict(self, nbytes: int) -> int:
+        """
+        Drops the oldest frames to free memory. The newest frame is kept.
+
+        Args:
+            nbytes (int): The number of bytes to free.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+
+        with self.lock:
+            freed = 0
+            while freed < nbytes and len(self.frames) > 1:
+                freed += self.frames.popleft()[1].nbytes
+            return freed
+
+    def clear(self) -> None:
+        """
+        Removes all frames from the buffer.
+        """
+
+        with self.lock:
+            freed = sum(frame.nbytes for _, frame in self.frames)
+            self.frames.clear()
+
+        if self.budget is not None:
+            self.budget.release(self, freed)
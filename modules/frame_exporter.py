@@ -0,0 +1,217 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PySide6.QtCore import QObject, Signal, Slot
+
+from configs.globals import EXPORT_SEGMENT_LENGTH, EXPORT_WORKERS
+from modules.export_jobs import exportGroups, exportSegment, planSegments
+from modules.regions import makeRegionFolders
+from modules.seek_planner import planSeeks
+
+
+class FrameExporter(QObject):
+    """
+    Exports marked frame ranges with worker processes. The exporter is meant to
+    live in its own thread, so the export does not block the GUI or the video engine.
+
+    Methods:
+        export(ranges, step, crop_values, pipeline, output_path, regions): Exports every Nth frame.
+        exportTargets(frame_numbers, crop_values, pipeline, output_path, regions): Exports a list of frames.
+        cancel(): Cancels a running export.
+
+    A failed export emits the error, and emit_finished is always emitted.
+    """
+
+    # emiters for UI update
+    emit_progress = Signal(int, int)
+    emit_finished = Signal(int)
+    emit_report = Signal(object)
+    emit_error = Signal(str)
+
+    def __init__(self, path: str, file_name: str, max_frames: int) -> None:
+        """
+        Initializes the FrameExporter.
+
+        Args:
+            path (str): The path to the video file.
+            file_name (str): The name of the video file without extension.
+            max_frames (int): The total number of frames in the video.
+        """
+
+        super().__init__()
+
+        self.path = path
+        self.file_name = file_name
+        self.max_frames = max_frames
+        self.cancelled = False
+
+    @Slot(object, int, object, str, str, object)
+    def export(
+        self,
+        ranges: list[tuple[int, int]],
+        step: int,
+        crop_values: tuple[int, int, int, int],
+        pipeline: str,
+        output_path: str,
+        regions: list[tuple[str, int, int, int, int]] = None,
+    ) -> None:
+        """
+        Exports every Nth frame of the ranges with the given crop values.
+
+        Args:
+            ranges (list[tuple[int, int]]): The (in, out) frame numbers, both inclusive.
+            step (int): Export every Nth frame of each range.
+            crop_values (tuple[int, int, int, int]): The left, right, top, and bottom crop values.
+            pipeline (str): The serialised preprocessing pipeline.
+            output_path (str): The folder to save the frames to.
+            regions (list[tuple[str, int, int, int, int]], optional): Save these regions
+                of every frame into one folder each, decoding every frame once.
+        """
+
+        self.cancelled = False
+        done = 0
+
+        try:
+            if not os.path.exists(output_path):
+                raise ValueError(f"Output path does not exist: {output_path}")
+            if regions:
+                makeRegionFolders(output_path, regions)
+
+            segments = planSegments(ranges, step)
+            total = sum(count for _, _, count in segments)
+            self.emit_progress.emit(done, total)
+
+            jobs = [
+                (
+                    self.path,
+                    first,
+                    last,
+                    step,
+                    crop_values,
+                    pipeline,
+                    output_path,
+                    self.file_name,
+                    regions,
+                )
+                for first, last, _ in segments
+            ]
+            for saved in self._runJobs(exportSegment, jobs):
+                done += saved
+                self.emit_progress.emit(done, total)
+        except Exception as error:
+            self.emit_error.emit(f"Export failed: {error}")
+        finally:
+            self.emit_finished.emit(done)
+
+    @Slot(object, object, str, str, object)
+    def exportTargets(
+        self,
+        frame_numbers: list[int],
+        crop_values: tuple[int, int, int, int],
+        pipeline: str,
+        output_path: str,
+        regions: list[tuple[str, int, int, int, int]] = None,
+    ) -> None:
+        """
+        Exports a list of frames in any order with the given crop values. The
+        frames are planned into seek groups first, see planSeeks, and a report
+        of the decode work is emitted when done.
+
+        Args:
+            frame_numbers (list[int]): The frame numbers to export, duplicates are saved once.
+            crop_values (tuple[int, int, int, int]): The left, right, top, and bottom crop values.
+            pipeline (str): The serialised preprocessing pipeline.
+            output_path (str): The folder to save the frames to.
+            regions (list[tuple[str, int, int, int, int]], optional): Save these regions
+                of every frame into one folder each, decoding every frame once.
+        """
+
+        self.cancelled = False
+        report = {
+            "requested": len(frame_numbers),
+            "targets": 0,
+            "groups": 0,
+            "saved": 0,
+            "seeks": 0,
+            "decoded": 0,
+        }
+
+        try:
+            if not os.path.exists(output_path):
+                raise ValueError(f"Output path does not exist: {output_path}")
+            if regions:
+                makeRegionFolders(output_path, regions)
+
+            # long groups are split at the segment length, so a dense list is
+            # spread over the workers instead of decoded by one
+            groups = planSeeks(frame_numbers, self.max_frames, EXPORT_SEGMENT_LENGTH)
+            report["targets"] = sum(len(frames) for _, frames in groups)
+            report["groups"] = len(groups)
+            self.emit_progress.emit(0, report["targets"])
+
+            # a job takes consecutive groups while they fit into a segment of
+            # frames, so workers don't open the video for every single group
+            jobs = [[]]
+            span = 0
+            for seek, frames in groups:
+                group_span = frames[-1] - frames[0] + 1
+                if jobs[-1] and span + group_span > EXPORT_SEGMENT_LENGTH:
+                    jobs.append([])
+                    span = 0
+                jobs[-1].append((seek, frames))
+                span += group_span
+
+            jobs = [
+                (
+                    self.path,
+                    job,
+                    crop_values,
+                    pipeline,
+                    output_path,
+                    self.file_name,
+                    regions,
+                )
+                for job in jobs
+                if job
+            ]
+            for saved, seeks, decoded in self._runJobs(exportGroups, jobs):
+                report["saved"] += saved
+                report["seeks"] += seeks
+                report["decoded"] += decoded
+                self.emit_progress.emit(report["saved"], report["targets"])
+
+            self.emit_report.emit(report)
+        except Exception as error:
+            self.emit_error.emit(f"Export failed: {error}")
+        finally:
+            self.emit_finished.emit(report["saved"])
+
+    def cancel(self) -> None:
+        """
+        Cancels a running export. Segments that already started are finished.
+        """
+
+        self.cancelled = True
+
+    def _runJobs(self, worker, jobs: list[tuple]):
+        """
+        Helper function to run the jobs in worker processes and yield their
+        results as they finish, until the export is cancelled.
+        """
+
+        # spawn fresh interpreters, forking a process with Qt threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=EXPORT_WORKERS, mp_context=context
+        ) as pool:
+            futures = [pool.submit(worker, *job) for job in jobs]
+            try:
+                for future in as_completed(futures):
+                    if self.cancelled:
+                        break
+                    yield future.result()
+            finally:
+                # on cancel or error the queued jobs are dropped, the running
+                # ones are finished
+                for future in futures:
+                    future.cancel()
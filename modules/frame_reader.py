@@ -0,0 +1,509 @@
+import asyncio
+import cv2
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator
+
+from configs.globals import FRAME_BUFFER_SIZE, FORWARD_DECODE_LIMIT
+from modules.frame_buffer import FrameBuffer
+from modules.preprocessing import Pipeline, writeFrame
+from modules.regions import makeRegionFolders, sliceRegions
+
+
+def cropFrame(frame: cv2.Mat, crop_values: tuple[int, int, int, int]) -> cv2.Mat:
+    """
+    Crops a frame without copying it.
+
+    Args:
+        frame (cv2.Mat): The frame to crop.
+        crop_values (tuple[int, int, int, int]): The left, right, top, and bottom crop values.
+
+    Returns:
+        cv2.Mat: A view of the cropped area of the frame.
+    """
+
+    # left and right are reversed because the crop values are from the left side
+    left, right, top, bottom = crop_values
+    height, width = frame.shape[:2]
+    return frame[top : height - bottom, left : width - right]
+
+
+class FrameReader:
+    """
+    Qt independent frame access and cropping for a video file.
+
+    Frames are returned as BGR views into the frame buffer, so copy a frame
+    before modifying it.
+
+    Methods:
+        updateCropValues(left, right, top, bottom): Updates the crop values for the video.
+        getCropValues(): Gets the current crop values for the video.
+        setPreviewScale(scale): Decodes reduced resolution frames for previews.
+        setDisplay(pipeline, crop_editing): Sets how the active frame is prepared for the display.
+        read(frame_number): Gets an uncropped frame.
+        readFull(frame_number): Gets an uncropped frame at full resolution.
+        getFrame(frame_number): Gets a cropped frame.
+        seek(frame_number): Makes a frame the active frame.
+        getDisplayFrame(): Gets the active frame prepared for the display.
+        frames(start, stop, step): Iterates over cropped frames.
+        aread(frame_number): Gets a cropped frame without blocking the event loop.
+        aframes(start, stop, step): Asynchronously iterates over cropped frames.
+        save(output_path, pipeline, regions): Save the current active frame to the specified output path.
+        release(): Releases the video source.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens the video file.
+
+        Args:
+            path(str): Path to the video source
+
+        Attributes:
+            source (cv2.VideoCapture): The video source.
+            path (str): The path to the video file.
+            file_name (str): The name of the video file without extension.
+            width (int): The width of the video frames.
+            height (int): The height of the video frames.
+            fps (float): The frames per second of the video.
+            max_frames (int): The total number of frames in the video.
+            crop_values (dict): The crop values for the video.
+            active_raw (cv2.Mat): The uncropped active frame, or None.
+            active_index (int): The frame number of the active frame.
+            decoder_index (int): The frame number the video source decodes next.
+            frame_buffer (FrameBuffer): The recently decoded frames behind the playhead.
+            preview_scale (float): The scale of the decoded frames, below 1.0 for previews.
+            display_pipeline (Pipeline): The preprocessing of the display frame.
+            crop_editing (bool): True if the display frame is uncropped and unprocessed.
+        """
+
+        # check if the file exists
+        if not os.path.exists(path):
+            raise ValueError(f"Video file does not exist: {path}")
+
+        # load the video file and check if it can be opened
+        self.source = cv2.VideoCapture(path)
+        if not self.source.isOpened():
+            raise ValueError(f"Unable to open video file: {path}")
+
+        self.path = path
+        self.file_name = os.path.splitext(os.path.basename(path))[0]
+        self.width = int(self.source.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.source.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.source.get(cv2.CAP_PROP_FPS)
+        self.max_frames = int(self.source.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        # this values are used to crop the video
+        self.crop_values = {
+            "left": 0,
+            "right": 0,
+            "top": 0,
+            "bottom": 0,
+        }
+
+        # keep track of the positions ourself, because frames served from the
+        # frame buffer do not move the video reader
+        self.active_raw = None
+        self.active_index = -1
+        self.decoder_index = 0
+        self.frame_buffer = FrameBuffer(FRAME_BUFFER_SIZE)
+        self.preview_scale = 1.0
+        self.display_pipeline = Pipeline()
+        self.crop_editing = False
+
+        # the video source is not thread safe, so every decode holds the lock
+        # and the asyncio API decodes in a single worker thread
+        self.lock = threading.RLock()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def __len__(self) -> int:
+        return self.max_frames
+
+    @property
+    def active_frame(self) -> None | cv2.Mat:
+        """
+        The cropped active frame, or None. The crop is applied on access, so
+        crop changes need no decoding.
+        """
+
+        if self.active_raw is None:
+            return None
+        return cropFrame(self.active_raw, self._scaledCropValues(self.active_raw))
+
+    def __getitem__(self, frame_number: int) -> cv2.Mat:
+        if frame_number < 0:
+            frame_number += self.max_frames
+        if not 0 <= frame_number < self.max_frames:
+            raise IndexError(f"Frame number out of range: {frame_number}")
+
+        frame = self.getFrame(frame_number)
+        if frame is None:
+            raise IndexError(f"Unable to decode frame: {frame_number}")
+        return frame
+
+    def __iter__(self) -> Iterator[cv2.Mat]:
+        return self.frames()
+
+    #
+    # ------------------------------- VIDEO EDITIONG -------------------------------
+    #
+
+    def updateCropValues(
+        self, left: int = None, right: int = None, top: int = None, bottom: int = None
+    ) -> None:
+        """
+        Updates the crop values for the video.
+
+        Args:
+            left (int, optional): The left crop value.
+            right (int, optional): The right crop value.
+            top (int, optional): The top crop value.
+            bottom (int, optional): The bottom crop value.
+
+        """
+
+        # only update the values if they are changed
+        if left is not None:
+            self.crop_values["left"] = left
+        if right is not None:
+            self.crop_values["right"] = right
+        if top is not None:
+            self.crop_values["top"] = top
+        if bottom is not None:
+            self.crop_values["bottom"] = bottom
+
+    def getCropValues(self) -> tuple[int, int, int, int]:
+        """
+        Gets the current crop values for the video.
+
+        Returns:
+            tuple[int, int, int, int]: The left, right, top, and bottom crop values.
+        """
+
+        return (
+            self.crop_values["left"],
+            self.crop_values["right"],
+            self.crop_values["top"],
+            self.crop_values["bottom"],
+        )
+
+    def setPreviewScale(self, scale: float) -> bool:
+        """
+        Decodes frames at reduced resolution, for previews that are much smaller
+        than the video. Saving still uses the full resolution.
+
+        Args:
+            scale (float): The scale of the decoded frames, 1.0 for full resolution.
+
+        Returns:
+            bool: True if the scale changed and the buffered frames were dropped.
+        """
+
+        if not 0 < scale <= 1:
+            raise ValueError(f"Preview scale must be in (0, 1]: {scale}")
+
+        with self.lock:
+            if scale == self.preview_scale:
+                return False
+
+            # the buffered frames have the old resolution
+            self.preview_scale = scale
+            self.frame_buffer.clear()
+            return True
+
+    def setDisplay(self, pipeline: Pipeline, crop_editing: bool) -> None:
+        """
+        Sets how the active frame is prepared for the display.
+
+        Args:
+            pipeline (Pipeline): The preprocessing applied to the cropped frame.
+            crop_editing (bool): True to show the uncropped and unprocessed frame
+                while the crop is edited.
+        """
+
+        self.display_pipeline = pipeline
+        self.crop_editing = crop_editing
+
+    def _scaledCropValues(self, frame: cv2.Mat) -> tuple[int, int, int, int]:
+        """
+        Helper function to scale the crop values to the resolution of a frame.
+        """
+
+        crop_values = self.getCropValues()
+        if frame.shape[1] == self.width:
+            return crop_values
+
+        scale = frame.shape[1] / self.width
+        return tuple(round(value * scale) for value in crop_values)
+
+    #
+    # ------------------------------- FRAME ACCESS -------------------------------
+    #
+
+    def read(self, frame_number: int) -> None | cv2.Mat:
+        """
+        Gets an uncropped frame with as little seeking as possible.
+
+        Frames behind the playhead are served from the frame buffer. Small
+        forward steps are decoded sequentially. Small backward steps that run
+        out of the buffer seek once and refill the buffer up to the frame.
+
+        Args:
+            frame_number (int): The frame number to get.
+
+        Returns:
+            cv2.Mat: The uncropped frame in BGR format, or None if it can't be decoded.
+        """
+
+        with self.lock:
+            frame = self.frame_buffer.get(frame_number)
+            if frame is not None:
+                return frame
+
+            distance = frame_number - self.decoder_index
+            if not 0 <= distance <= FORWARD_DECODE_LIMIT:
+                step_back = self.active_index - frame_number
+                if 0 < step_back <= self.frame_buffer.capacity:
+                    # opencv seeks to the keyframe before the requested frame and
+                    # decodes up to it anyway, so decode the whole batch behind
+                    # the frame in one go to serve the next backward steps
+                    start = max(0, frame_number - self.frame_buffer.capacity + 1)
+                else:
+                    start = frame_number
+
+                self.source.set(cv2.CAP_PROP_POS_FRAMES, start)
+                self.decoder_index = start
+
+            # decode up to the requested frame
+            # Note: this automatically updates the position of the video reader
+            while self.decoder_index <= frame_number:
+                ret, frame = self.source.read()
+                if not ret:
+                    return None
+
+                # converting at preview resolution right after decoding keeps
+                # the buffer and every later conversion small
+                if self.preview_scale < 1:
+                    frame = cv2.resize(
+                        frame,
+                        None,
+                        fx=self.preview_scale,
+                        fy=self.preview_scale,
+                        interpolation=cv2.INTER_AREA,
+                    )
+                self.frame_buffer.push(self.decoder_index, frame)
+                self.decoder_index += 1
+
+            return frame
+
+    def getFrame(self, frame_number: int) -> None | cv2.Mat:
+        """
+        Gets a cropped frame.
+
+        Args:
+            frame_number (int): The frame number to get.
+
+        Returns:
+            cv2.Mat: The cropped frame in BGR format, or None if it can't be decoded.
+        """
+
+        frame = self.read(frame_number)
+        if frame is None:
+            return None
+        return cropFrame(frame, self._scaledCropValues(frame))
+
+    def readFull(self, frame_number: int) -> None | cv2.Mat:
+        """
+        Gets an uncropped frame at full resolution, decoding it again if the
+        buffered frames are previews.
+
+        Args:
+            frame_number (int): The frame number to get.
+
+        Returns:
+            cv2.Mat: The uncropped frame in BGR format, or None if it can't be decoded.
+        """
+
+        with self.lock:
+            if self.preview_scale == 1:
+                return self.read(frame_number)
+
+            # bypass the buffer, it only holds preview frames
+            self.source.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ret, frame = self.source.read()
+            self.decoder_index = frame_number + 1 if ret else frame_number
+            return frame if ret else None
+
+    def seek(self, frame_number: int) -> None | cv2.Mat:
+        """
+        Makes a frame the active frame.
+
+        Args:
+            frame_number (int): The frame number to show.
+
+        Returns:
+            cv2.Mat: The cropped active frame in BGR format, or None if it can't be decoded.
+        """
+
+        frame = self.read(frame_number)
+        if frame is None:
+            return None
+
+        # keep the uncropped frame, so a new crop can be applied without decoding
+        self.active_index = frame_number
+        self.active_raw = frame
+        return self.active_frame
+
+    def getDisplayFrame(self) -> None | cv2.Mat:
+        """
+        Gets the active frame prepared for the display with the display settings.
+
+        Returns:
+            cv2.Mat: The cropped and processed active frame in RGB format, uncropped
+                and unprocessed while editing the crop, or None if there is none.
+        """
+
+        if self.active_raw is None:
+            return None
+
+        if self.crop_editing:
+            return cv2.cvtColor(self.active_raw, cv2.COLOR_BGR2RGB)
+
+        pipeline = self.display_pipeline
+        return pipeline.toRGB(pipeline.apply(self.active_frame))
+
+    def frames(
+        self, start: int = 0, stop: int = None, step: int = 1
+    ) -> Iterator[cv2.Mat]:
+        """
+        Iterates over cropped frames, decoding sequentially where possible.
+
+        Args:
+            start (int, optional): The first frame number.
+            stop (int, optional): The frame number to stop before, defaults to the end.
+            step (int, optional): Yield every Nth frame.
+
+        Yields:
+            cv2.Mat: The cropped frames in BGR format.
+        """
+
+        stop = self.max_frames if stop is None else stop
+        for frame_number in range(start, stop, step):
+            frame = self.getFrame(frame_number)
+            if frame is None:
+                return
+            yield frame
+
+    async def aread(self, frame_number: int) -> None | cv2.Mat:
+        """
+        Gets a cropped frame, decoding it in the executor.
+
+        Args:
+            frame_number (int): The frame number to get.
+
+        Returns:
+            cv2.Mat: The cropped frame in BGR format, or None if it can't be decoded.
+        """
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.getFrame, frame_number)
+
+    async def aframes(
+        self, start: int = 0, stop: int = None, step: int = 1
+    ) -> AsyncIterator[cv2.Mat]:
+        """
+        Asynchronously iterates over cropped frames. The next frame is decoded in
+        the executor while the current one is processed.
+
+        Args:
+            start (int, optional): The first frame number.
+            stop (int, optional): The frame number to stop before, defaults to the end.
+            step (int, optional): Yield every Nth frame.
+
+        Yields:
+            cv2.Mat: The cropped frames in BGR format.
+        """
+
+        loop = asyncio.get_running_loop()
+        stop = self.max_frames if stop is None else stop
+
+        pending = None
+        for frame_number in range(start, stop, step):
+            upcoming = loop.run_in_executor(self.executor, self.getFrame, frame_number)
+            if pending is not None:
+                frame = await pending
+                if frame is None:
+                    return
+                yield frame
+            pending = upcoming
+
+        if pending is not None:
+            frame = await pending
+            if frame is not None:
+                yield frame
+
+    #
+    # ------------------------------------ MISC -----------------------------------
+    #
+
+    def save(
+        self,
+        output_path: str,
+        pipeline: Pipeline = None,
+        regions: list[tuple[str, int, int, int, int]] = None,
+    ) -> None:
+        """
+        Save the current active frame to the specified output path.
+
+        Args:
+            output_path (str): The path to save the frame to.
+            pipeline (Pipeline, optional): The preprocessing to apply before saving.
+            regions (list[tuple[str, int, int, int, int]], optional): Save these regions
+                of the cropped frame into one folder each, instead of the whole frame.
+
+        """
+
+        # save the current active frame to the output path when output path is valid
+        if not os.path.exists(output_path):
+            raise ValueError(f"Output path does not exist: {output_path}")
+
+        frame = self._fullActiveFrame()
+        if pipeline is None:
+            pipeline = Pipeline()
+
+        file_stem = f"{self.file_name}_Frame-{self.active_index + 1}"
+        if not regions:
+            writeFrame(os.path.join(output_path, file_stem), pipeline.apply(frame))
+            return
+
+        makeRegionFolders(output_path, regions)
+        for name, patch in sliceRegions(frame, regions):
+            writeFrame(
+                os.path.join(output_path, name, file_stem), pipeline.apply(patch)
+            )
+
+    def _fullActiveFrame(self) -> cv2.Mat:
+        """
+        Helper function to get the cropped active frame at full resolution.
+        """
+
+        if self.preview_scale == 1 and self.active_raw is not None:
+            return self.active_frame
+
+        full = self.readFull(self.active_index)
+        if full is None:
+            raise ValueError(f"Unable to decode frame: {self.active_index}")
+        return cropFrame(full, self.getCropValues())
+
+    def release(self) -> None:
+        """
+        Releases the video source and the executor.
+        """
+
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        with self.lock:
+            self.frame_buffer.clear()
+            self.active_raw = None
+            if self.source is not None:
+                self.source.release()
@@ -0,0 +1,311 @@
+import cv2
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Iterator
+
+import numpy as np
+
+from configs.globals import SAMPLER_WORKERS, SAMPLER_PREFETCH, QUALITY_STRIDE
+from modules.frame_reader import FrameReader
+from modules.memory_budget import memory_budget
+
+
+class FrameSampler:
+    """
+    Samples batches of cropped frames as contiguous (N, H, W, 3) uint8 arrays.
+
+    The batches are filled into preallocated buffers that are reused, so a batch
+    is only valid until the next batch is requested. Copy it to keep it.
+
+    Methods:
+        sampleFrameNumbers(): Picks the frame numbers to sample with the strategy.
+        scoreFrames(): Scores the frames by sharpness for quality weighted sampling.
+        getThroughput(): Gets the sampled frames per second of the current run.
+        release(): Releases the decoding threads and the video readers.
+    """
+
+    STRATEGIES = ("uniform", "random", "quality")
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 32,
+        num_samples: int = None,
+        strategy: str = "uniform",
+        crop_values: tuple[int, int, int, int] = (0, 0, 0, 0),
+        size: tuple[int, int] = None,
+        rgb: bool = True,
+        weights: np.ndarray = None,
+        workers: int = SAMPLER_WORKERS,
+        prefetch: int = SAMPLER_PREFETCH,
+        seed: int = None,
+    ) -> None:
+        """
+        Initializes the FrameSampler.
+
+        Args:
+            path (str): Path to the video source.
+            batch_size (int, optional): The number of frames per batch.
+            num_samples (int, optional): The number of frames per run, defaults to all frames.
+            strategy (str, optional): One of "uniform", "random" or "quality".
+            crop_values (tuple[int, int, int, int], optional): The left, right, top, and bottom crop values.
+            size (tuple[int, int], optional): Resize the cropped frames to (width, height).
+            rgb (bool, optional): Return RGB instead of BGR frames.
+            weights (np.ndarray, optional): Per frame weights for the "quality" strategy,
+                scored by sharpness when not given.
+            workers (int, optional): The number of threads decoding batches.
+            prefetch (int, optional): The number of batches decoded ahead.
+            seed (int, optional): The seed for the random strategies.
+        """
+
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown sampling strategy: {strategy}")
+        if batch_size < 1 or prefetch < 1 or workers < 1:
+            raise ValueError("Batch size, prefetch and workers must be positive")
+
+        self.path = path
+        self.batch_size = batch_size
+        self.strategy = strategy
+        self.crop_values = crop_values
+        self.size = size
+        self.rgb = rgb
+        self.weights = weights
+        self.workers = workers
+        self.prefetch = prefetch
+        self.rng = np.random.default_rng(seed)
+
+        # every decoding thread gets its own reader, because the video
+        # source is not thread safe. The threads are kept over the runs, so
+        # their readers are reused
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.readers = []
+        self.local = threading.local()
+        reader = self._getReader()
+        self.max_frames = reader.max_frames
+        self.num_samples = self.max_frames if num_samples is None else num_samples
+
+        if size is not None:
+            self.frame_shape = (size[1], size[0], 3)
+        else:
+            left, right, top, bottom = crop_values
+            self.frame_shape = (
+                reader.height - top - bottom,
+                reader.width - left - right,
+                3,
+            )
+
+        if weights is not None and len(weights) != self.max_frames:
+            raise ValueError(
+                f"Expected {self.max_frames} frame weights, got {len(weights)}"
+            )
+
+        # the sharpness scores of the quality strategy, scored on the first run
+        self.scores = None
+
+        self.frames_sampled = 0
+        self.start_time = None
+
+    def __len__(self) -> int:
+        return -(-self.num_samples // self.batch_size)
+
+    def __iter__(self) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """
+        Iterates over the batches of one run.
+
+        Yields:
+            tuple[np.ndarray, np.ndarray]: The frame numbers and the (N, H, W, 3) frames.
+        """
+
+        frame_numbers = self.sampleFrameNumbers()
+
+        # sort every batch by frame number, so the reader decodes forward
+        # from one keyframe instead of seeking for every frame
+        batches = [
+            np.sort(frame_numbers[i : i + self.batch_size])
+            for i in range(0, len(frame_numbers), self.batch_size)
+        ]
+
+        # one buffer is held by the consumer, the others are being filled
+        buffers = [
+            np.empty((self.batch_size, *self.frame_shape), dtype=np.uint8)
+            for _ in range(self.prefetch + 1)
+        ]
+
+        # the batch buffers can't be evicted, but count against the budget
+        # so the frame buffers make room for them
+        reserved = sum(buffer.nbytes for buffer in buffers)
+        memory_budget.reserve(self, reserved)
+
+        self.frames_sampled = 0
+        self.start_time = time.perf_counter()
+
+        pending = deque()
+        try:
+            for k in range(min(self.prefetch, len(batches))):
+                pending.append(
+                    self.pool.submit(self._fillBatch, buffers[k], batches[k])
+                )
+
+            for k in range(len(batches)):
+                count = pending.popleft().result()
+
+                # the buffer of the previous batch is free again
+                upcoming = k + self.prefetch
+                if upcoming < len(batches):
+                    buffer = buffers[upcoming % len(buffers)]
+                    pending.append(
+                        self.pool.submit(self._fillBatch, buffer, batches[upcoming])
+                    )
+
+                self.frames_sampled += count
+                yield batches[k][:count], buffers[k % len(buffers)][:count]
+        finally:
+            # the batches being filled are waited for, so no thread writes
+            # into the buffers after the run
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            memory_budget.release(self, reserved)
+
+    #
+    # ------------------------------- SAMPLING -------------------------------
+    #
+
+    def sampleFrameNumbers(self) -> np.ndarray:
+        """
+        Picks the frame numbers to sample with the strategy.
+
+        Returns:
+            np.ndarray: The frame numbers in sampling order.
+        """
+
+        if self.strategy == "uniform":
+            return np.linspace(0, self.max_frames - 1, self.num_samples).astype(
+                np.int64
+            )
+
+        if self.strategy == "random":
+            return self.rng.choice(
+                self.max_frames,
+                self.num_samples,
+                replace=self.num_samples > self.max_frames,
+            )
+
+        # quality weighted
+        if self.weights is not None:
+            candidates = np.arange(self.max_frames)
+            weights = np.asarray(self.weights, dtype=np.float64)
+        else:
+            if self.scores is None:
+                self.scores = self.scoreFrames()
+            candidates, weights = self.scores
+
+        if weights.sum() <= 0:
+            raise ValueError("Frame weights must not all be zero")
+
+        return self.rng.choice(
+            candidates,
+            self.num_samples,
+            replace=self.num_samples > np.count_nonzero(weights),
+            p=weights / weights.sum(),
+        )
+
+    def scoreFrames(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Scores every QUALITY_STRIDE-th frame by sharpness, the variance of the
+        Laplacian of a downscaled grayscale frame.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The scored frame numbers and their scores.
+        """
+
+        reader = self._getReader()
+        candidates = np.arange(0, self.max_frames, QUALITY_STRIDE)
+        scores = np.zeros(len(candidates), dtype=np.float64)
+
+        for i, frame in enumerate(reader.frames(step=QUALITY_STRIDE)):
+            scale = min(1.0, 320 / frame.shape[1])
+            small = cv2.resize(
+                frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+            )
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            scores[i] = cv2.Laplacian(gray, cv2.CV_64F).var()
+
+        # flat frames keep a small chance, so a flat video can still be sampled
+        return candidates, scores + 1e-6
+
+    def getThroughput(self) -> float:
+        """
+        Gets the sampled frames per second of the current run.
+
+        Returns:
+            float: The frames per second, or 0.0 before the first run.
+        """
+
+        if self.start_time is None:
+            return 0.0
+
+        elapsed = time.perf_counter() - self.start_time
+        return self.frames_sampled / elapsed if elapsed > 0 else 0.0
+
+    def release(self) -> None:
+        """
+        Releases the decoding threads and the video readers.
+        """
+
+        # a new pool starts its threads only when the sampler is used again
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+
+        for reader in self.readers:
+            reader.release()
+        self.readers = []
+        self.local = threading.local()
+
+    #
+    # ------------------------------- HELPERS -------------------------------
+    #
+
+    def _getReader(self) -> FrameReader:
+        """
+        Helper function to get the reader of the current thread.
+        """
+
+        reader = getattr(self.local, "reader", None)
+        if reader is None:
+            reader = FrameReader(self.path)
+            reader.updateCropValues(*self.crop_values)
+            self.local.reader = reader
+            self.readers.append(reader)
+        return reader
+
+    def _fillBatch(self, buffer: np.ndarray, frame_numbers: np.ndarray) -> int:
+        """
+        Helper function to decode a batch into a buffer.
+
+        Args:
+            buffer (np.ndarray): The (N, H, W, 3) buffer to fill.
+            frame_numbers (np.ndarray): The sorted frame numbers to decode.
+
+        Returns:
+            int: The number of frames decoded, less than requested at the end of the video.
+        """
+
+        reader = self._getReader()
+        for i, frame_number in enumerate(frame_numbers):
+            frame = reader.getFrame(int(frame_number))
+            if frame is None:
+                return i
+
+            if self.size is not None:
+                frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+
+            # write straight into the batch, without an intermediate copy
+            if self.rgb:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=buffer[i])
+            else:
+                np.copyto(buffer[i], frame)
+
+        return len(frame_numbers)
@@ -0,0 +1,147 @@
+import threading
+import weakref
+
+from configs.globals import MEMORY_BUDGET_MB
+
+
+class MemoryBudget:
+    """
+    Memory budget shared by every frame buffer, cache and queue of the app.
+
+    Consumers reserve the bytes they hold. When the reservations exceed the
+    limit, consumers with an evict(nbytes) method are asked to free memory,
+    the lowest priority first, until the usage is back under the limit.
+    Consumers without an evict method are counted but never evicted.
+
+    Methods:
+        register(consumer, priority): Sets the eviction priority of a consumer.
+        reserve(consumer, nbytes): Reserves memory and evicts under pressure.
+        release(consumer, nbytes): Releases reserved memory.
+        setLimit(limit): Changes the budget and evicts under pressure.
+        getUsage(): Gets the reserved bytes.
+        getPressure(): Gets the usage relative to the limit.
+    """
+
+    def __init__(self, limit: int) -> None:
+        """
+        Initializes the memory budget.
+
+        Args:
+            limit (int): The budget in bytes.
+
+        Attributes:
+            limit (int): The budget in bytes.
+            usage (WeakKeyDictionary): The reserved bytes per consumer.
+            priorities (WeakKeyDictionary): The eviction priority per consumer.
+        """
+
+        if limit < 1:
+            raise ValueError(f"Memory budget must be positive: {limit}")
+
+        self.limit = limit
+        self.usage = weakref.WeakKeyDictionary()
+        self.priorities = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    def register(self, consumer: object, priority: int = 0) -> None:
+        """
+        Sets the eviction priority of a consumer.
+
+        Args:
+            consumer (object): The consumer, kept as a weak reference.
+            priority (int, optional): Lower priorities are evicted first.
+        """
+
+        with self.lock:
+            self.priorities[consumer] = priority
+            self.usage.setdefault(consumer, 0)
+
+    def reserve(self, consumer: object, nbytes: int) -> None:
+        """
+        Reserves memory for a consumer and evicts other memory under pressure.
+
+        Args:
+            consumer (object): The consumer holding the memory.
+            nbytes (int): The number of bytes to reserve.
+        """
+
+        with self.lock:
+            self.usage[consumer] = self.usage.get(consumer, 0) + nbytes
+            over = sum(self.usage.values()) - self.limit
+            if over <= 0:
+                return
+
+            # snapshot the evictable consumers, lowest priority and largest first
+            candidates = sorted(
+                (
+                    (self.priorities.get(other, 0), -used, id(other), other)
+                    for other, used in self.usage.items()
+                    if used > 0 and hasattr(other, "evict")
+                ),
+                key=lambda candidate: candidate[:3],
+            )
+
+        # evict without holding the lock, the consumers lock themselves
+        for _, _, _, other in candidates:
+            freed = other.evict(over)
+            self.release(other, freed)
+            over -= freed
+            if over <= 0:
+                break
+
+    def release(self, consumer: object, nbytes: int) -> None:
+        """
+        Releases reserved memory of a consumer.
+
+        Args:
+            consumer (object): The consumer holding the memory.
+            nbytes (int): The number of bytes to release.
+        """
+
+        if nbytes <= 0:
+            return
+
+        with self.lock:
+            self.usage[consumer] = max(0, self.usage.get(consumer, 0) - nbytes)
+
+    def setLimit(self, limit: int) -> None:
+        """
+        Changes the budget and evicts memory when the usage is over the new limit.
+
+        Args:
+            limit (int): The budget in bytes.
+        """
+
+        if limit < 1:
+            raise ValueError(f"Memory budget must be positive: {limit}")
+
+        with self.lock:
+            self.limit = limit
+
+        # reserving nothing evicts down to the new limit
+        self.reserve(self, 0)
+
+    def getUsage(self) -> int:
+        """
+        Gets the reserved bytes.
+
+        Returns:
+            int: The reserved bytes of all consumers.
+        """
+
+        with self.lock:
+            return sum(self.usage.values())
+
+    def getPressure(self) -> float:
+        """
+        Gets the usage relative to the limit.
+
+        Returns:
+            float: The usage divided by the limit, above 1.0 when over budget.
+        """
+
+        return self.getUsage() / self.limit
+
+
+# the budget shared by the whole app
+memory_budget = MemoryBudget(MEMORY_BUDGET_MB * 1024 * 1024)
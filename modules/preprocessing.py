@@ -0,0 +1,510 @@
+import cv2
+import json
+import os
+
+import numpy as np
+
+# the required parameters and the defaults of the optional ones for every operation
+OPERATIONS = {
+    "resize": {"width": None, "height": None},
+    "rotate": {"angle": None},
+    "flip": {"direction": None},
+    "letterbox": {"width": None, "height": None, "value": 114},
+    "color": {"space": None},
+    "normalize": {"mean": 0.0, "std": 1.0, "scale": 1 / 255},
+}
+
+GEOMETRIC = ("resize", "rotate", "flip", "letterbox")
+LINEAR_COLOR = ("rgb", "gray")
+NONLINEAR_COLOR = {
+    ("bgr", "hsv"): cv2.COLOR_BGR2HSV,
+    ("rgb", "hsv"): cv2.COLOR_RGB2HSV,
+    ("bgr", "lab"): cv2.COLOR_BGR2LAB,
+    ("rgb", "lab"): cv2.COLOR_RGB2LAB,
+}
+
+# below this scale a single bilinear warp aliases, so the frame is area
+# downscaled first
+MIN_WARP_SCALE = 0.5
+
+
+def writeFrame(path: str, frame: np.ndarray) -> str:
+    """
+    Writes a processed frame, as jpg for 8 bit frames and as npy for normalized
+    float frames, so no precision is lost.
+
+    Args:
+        path (str): The path to write to, without extension.
+        frame (np.ndarray): The processed frame.
+
+    Returns:
+        str: The path of the written file.
+    """
+
+    if frame.dtype == np.uint8:
+        path = f"{path}.jpg"
+        cv2.imwrite(path, frame)
+    else:
+        path = f"{path}.npy"
+        np.save(path, frame)
+    return path
+
+
+class Pipeline:
+    """
+    Serialisable chain of preprocessing operations for cropped BGR frames.
+
+    Adjacent operations are fused before they run: a run of geometric operations
+    becomes one affine warp, and a run of channel swaps, grayscale conversions
+    and normalizations becomes one matrix transform, so there are as few passes
+    over the frame as possible.
+
+    Methods:
+        addOperation(name, **params): Appends an operation.
+        removeOperation(index): Removes an operation.
+        getOperations(): Gets the operations.
+        apply(frame): Runs the pipeline on a frame.
+        toRGB(frame): Converts a processed frame for display.
+        toJSON(): Serialises the pipeline.
+        fromJSON(text): Creates a pipeline from its serialised form.
+        save(path): Saves the pipeline to a json file.
+        load(path): Loads a pipeline from a json file.
+    """
+
+    def __init__(self, operations: list[dict] = None) -> None:
+        """
+        Initializes the pipeline.
+
+        Args:
+            operations (list[dict], optional): The operations, each a dict with the
+                name in "op" and its parameters.
+
+        Attributes:
+            operations (list[dict]): The validated operations.
+            plans (dict): The compiled stages per input shape and dtype.
+            output_order (str): The channel order of the last processed frame.
+        """
+
+        self.operations = []
+        self.plans = {}
+        self.output_order = "bgr"
+
+        for operation in operations or []:
+            operation = dict(operation)
+            self.addOperation(operation.pop("op"), **operation)
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    #
+    # ------------------------------- OPERATIONS -------------------------------
+    #
+
+    def addOperation(self, name: str, **params) -> "Pipeline":
+        """
+        Appends an operation.
+
+        Args:
+            name (str): The name of the operation.
+            **params: The parameters of the operation.
+
+        Returns:
+            Pipeline: The pipeline itself, to chain calls.
+        """
+
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown preprocessing operation: {name}")
+
+        defaults = OPERATIONS[name]
+        unknown = set(params) - set(defaults)
+        if unknown:
+            raise ValueError(f"Unknown parameters for {name}: {sorted(unknown)}")
+
+        operation = {"op": name}
+        for key, default in defaults.items():
+            value = params.get(key, default)
+            if value is None:
+                raise ValueError(f"Missing parameter for {name}: {key}")
+            operation[key] = value
+
+        if name == "rotate" and operation["angle"] % 90 != 0:
+            raise ValueError(f"Rotation must be a multiple of 90: {operation['angle']}")
+        if name == "flip" and operation["direction"] not in ("horizontal", "vertical"):
+            raise ValueError(f"Unknown flip direction: {operation['direction']}")
+        if name == "color" and operation["space"] not in ("rgb", "gray", "hsv", "lab"):
+            raise ValueError(f"Unknown color space: {operation['space']}")
+        # the padding value is a pixel value, it has no meaning on normalized frames
+        if name == "letterbox" and any(
+            previous["op"] == "normalize" for previous in self.operations
+        ):
+            raise ValueError("Letterbox must come before normalize")
+
+        self.operations.append(operation)
+        self.plans = {}
+        return self
+
+    def removeOperation(self, index: int) -> None:
+        """
+        Removes an operation.
+
+        Args:
+            index (int): The position of the operation.
+        """
+
+        del self.operations[index]
+        self.plans = {}
+
+    def getOperations(self) -> list[dict]:
+        """
+        Gets the operations.
+
+        Returns:
+            list[dict]: Copies of the operations.
+        """
+
+        return [dict(operation) for operation in self.operations]
+
+    #
+    # ------------------------------- PROCESSING -------------------------------
+    #
+
+    def apply(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Runs the pipeline on a frame.
+
+        Args:
+            frame (np.ndarray): The cropped BGR frame.
+
+        Returns:
+            np.ndarray: The processed frame, the input itself for an empty pipeline.
+        """
+
+        if not self.operations:
+            return frame
+
+        stages, self.output_order = self._getPlan(frame)
+        for stage in stages:
+            frame = stage(frame)
+        return frame
+
+    def toRGB(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Converts a processed frame to 8 bit RGB for display.
+
+        Args:
+            frame (np.ndarray): The frame returned by apply.
+
+        Returns:
+            np.ndarray: The frame as (H, W, 3) uint8 RGB.
+        """
+
+        order = self.output_order if self.operations else "bgr"
+
+        # stretch normalized frames to the visible range
+        if frame.dtype != np.uint8:
+            frame = cv2.normalize(frame, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+
+        if frame.ndim == 2 or frame.shape[2] == 1:
+            return cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB)
+        if order == "bgr":
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return np.ascontiguousarray(frame)
+
+    #
+    # ------------------------------- SERIALISATION -------------------------------
+    #
+
+    def toJSON(self) -> str:
+        """
+        Serialises the pipeline.
+
+        Returns:
+            str: The operations as json.
+        """
+
+        return json.dumps(self.operations)
+
+    @classmethod
+    def fromJSON(cls, text: str) -> "Pipeline":
+        """
+        Creates a pipeline from its serialised form.
+
+        Args:
+            text (str): The operations as json.
+
+        Returns:
+            Pipeline: The pipeline.
+        """
+
+        return cls(json.loads(text))
+
+    def save(self, path: str) -> None:
+        """
+        Saves the pipeline to a json file.
+
+        Args:
+            path (str): The path of the json file.
+        """
+
+        with open(path, "w") as file:
+            file.write(self.toJSON())
+
+    @classmethod
+    def load(cls, path: str) -> "Pipeline":
+        """
+        Loads a pipeline from a json file.
+
+        Args:
+            path (str): The path of the json file.
+
+        Returns:
+            Pipeline: The pipeline.
+        """
+
+        if not os.path.exists(path):
+            raise ValueError(f"Pipeline file does not exist: {path}")
+
+        with open(path) as file:
+            return cls.fromJSON(file.read())
+
+    #
+    # ------------------------------- COMPILING -------------------------------
+    #
+
+    def _getPlan(self, frame: np.ndarray) -> tuple[list, str]:
+        """
+        Helper function to get the compiled stages for the shape of a frame.
+        """
+
+        key = (frame.shape, frame.dtype.str)
+        if key not in self.plans:
+            self.plans[key] = self._compile(frame.shape, frame.dtype)
+        return self.plans[key]
+
+    def _compile(self, shape: tuple, dtype: np.dtype) -> tuple[list, str]:
+        """
+        Helper function to fuse the operations into stages for an input shape.
+        """
+
+        height, width = shape[:2]
+        channels = 1 if len(shape) == 2 else shape[2]
+        is_float = dtype != np.uint8
+        order = "bgr" if channels == 3 else "gray"
+
+        stages = []
+        i = 0
+        while i < len(self.operations):
+            name = self.operations[i]["op"]
+
+            # fuse every adjacent geometric operation into one warp
+            if name in GEOMETRIC:
+                run = []
+                while (
+                    i < len(self.operations) and self.operations[i]["op"] in GEOMETRIC
+                ):
+                    run.append(self.operations[i])
+                    i += 1
+                stage, width, height = self._compileGeometric(run, width, height)
+                stages.append(stage)
+                continue
+
+            # fuse every adjacent linear color operation into one transform
+            if name == "normalize" or (
+                name == "color" and self.operations[i]["space"] in LINEAR_COLOR
+            ):
+                run = []
+                while i < len(self.operations) and (
+                    self.operations[i]["op"] == "normalize"
+                    or (
+                        self.operations[i]["op"] == "color"
+                        and self.operations[i]["space"] in LINEAR_COLOR
+                    )
+                ):
+                    run.append(self.operations[i])
+                    i += 1
+                stage, channels, order, is_float = self._compileLinear(
+                    run, channels, order, is_float
+                )
+                stages.append(stage)
+                continue
+
+            # nonlinear color spaces need their own conversion
+            space = self.operations[i]["space"]
+            if (order, space) not in NONLINEAR_COLOR:
+                raise ValueError(f"Can't convert {order} frames to {space}")
+            code = NONLINEAR_COLOR[(order, space)]
+            stages.append(lambda frame, code=code: cv2.cvtColor(frame, code))
+            order = space
+            i += 1
+
+        return stages, order
+
+    def _compileGeometric(
+        self, run: list[dict], width: int, height: int
+    ) -> tuple[callable, int, int]:
+        """
+        Helper function to fuse geometric operations into one affine warp.
+        """
+
+        matrix = np.eye(3)
+        value = None
+        input_width, input_height = width, height
+
+        for operation in run:
+            name = operation["op"]
+            if name == "rotate":
+                # clockwise rotation in pixel coordinates
+                turns = (operation["angle"] // 90) % 4
+                for _ in range(turns):
+                    step = np.array([[0, -1, height - 1], [1, 0, 0], [0, 0, 1]])
+                    matrix = step @ matrix
+                    width, height = height, width
+            elif name == "flip":
+                if operation["direction"] == "horizontal":
+                    step = np.array([[-1, 0, width - 1], [0, 1, 0], [0, 0, 1]])
+                else:
+                    step = np.array([[1, 0, 0], [0, -1, height - 1], [0, 0, 1]])
+                matrix = step @ matrix
+            else:
+                target_width, target_height = operation["width"], operation["height"]
+                if name == "letterbox":
+                    # fit the frame inside and center it on the padding
+                    scale = min(target_width / width, target_height / height)
+                    new_width = max(1, round(width * scale))
+                    new_height = max(1, round(height * scale))
+                    offset_x = (target_width - new_width) // 2
+                    offset_y = (target_height - new_height) // 2
+                    value = operation["value"]
+                else:
+                    new_width, new_height = target_width, target_height
+                    offset_x = offset_y = 0
+
+                # scale around the pixel centers
+                sx, sy = new_width / width, new_height / height
+                step = np.array(
+                    [
+                        [sx, 0, 0.5 * sx - 0.5 + offset_x],
+                        [0, sy, 0.5 * sy - 0.5 + offset_y],
+                        [0, 0, 1],
+                    ]
+                )
+                matrix = step @ matrix
+                width, height = target_width, target_height
+
+        # the padding of a letterbox is everything outside the frame content,
+        # an axis aligned rectangle in the output, in pixel edge coordinates
+        content = None
+        if value is not None:
+            corners = matrix @ np.array(
+                [[-0.5, input_width - 0.5], [-0.5, input_height - 0.5], [1, 1]]
+            )
+            left, right = sorted(np.round(corners[0] + 0.5).astype(int))
+            top, bottom = sorted(np.round(corners[1] + 0.5).astype(int))
+            content = (
+                max(left, 0),
+                min(right, width),
+                max(top, 0),
+                min(bottom, height),
+            )
+
+        # the scale along each input axis, the operations only swap axes
+        scale_x = np.abs(matrix[:2, 0]).max()
+        scale_y = np.abs(matrix[:2, 1]).max()
+
+        prescale = None
+        if min(scale_x, scale_y) < MIN_WARP_SCALE:
+            # area downscale first, the warp then only needs a small scale
+            prescale = (min(scale_x, 1.0), min(scale_y, 1.0))
+            inverse = np.array(
+                [
+                    [1 / prescale[0], 0, 0.5 / prescale[0] - 0.5],
+                    [0, 1 / prescale[1], 0.5 / prescale[1] - 0.5],
+                    [0, 0, 1],
+                ]
+            )
+            matrix = matrix @ inverse
+
+        # pure flips and rotations map pixels onto pixels
+        exact = np.allclose(np.abs(matrix[:2, :2]).max(axis=0), 1.0)
+        interpolation = cv2.INTER_NEAREST if exact else cv2.INTER_LINEAR
+        affine = matrix[:2].astype(np.float64)
+        size = (width, height)
+
+        def stage(frame):
+            if prescale is not None:
+                frame = cv2.resize(
+                    frame,
+                    (
+                        max(1, round(frame.shape[1] * prescale[0])),
+                        max(1, round(frame.shape[0] * prescale[1])),
+                    ),
+                    interpolation=cv2.INTER_AREA,
+                )
+            # the edges of the content are sampled from the edge pixels like
+            # cv2.resize does, instead of being blended with black
+            frame = cv2.warpAffine(
+                frame,
+                affine,
+                size,
+                flags=interpolation,
+                borderMode=cv2.BORDER_REPLICATE,
+            )
+            if content is not None:
+                left, right, top, bottom = content
+                frame[:top] = value
+                frame[bottom:] = value
+                frame[:, :left] = value
+                frame[:, right:] = value
+            return frame
+
+        return stage, width, height
+
+    def _compileLinear(
+        self, run: list[dict], channels: int, order: str, is_float: bool
+    ) -> tuple[callable, int, str, bool]:
+        """
+        Helper function to fuse channel swaps, grayscale conversions and
+        normalizations into one matrix transform.
+        """
+
+        if order not in ("bgr", "rgb", "gray"):
+            raise ValueError(f"Can't apply linear color operations to {order} frames")
+
+        matrix = np.eye(channels)
+        offset = np.zeros(channels)
+
+        for operation in run:
+            if operation["op"] == "color":
+                if order == "gray":
+                    raise ValueError(
+                        f"Can't convert gray frames to {operation['space']}"
+                    )
+                if operation["space"] == "rgb":
+                    # frames that are already rgb stay as they are
+                    if order == "rgb":
+                        continue
+                    step = np.eye(3)[::-1]
+                    order = "rgb"
+                else:
+                    weights = [0.114, 0.587, 0.299]
+                    step = np.array([weights if order == "bgr" else weights[::-1]])
+                    order = "gray"
+                    channels = 1
+                matrix = step @ matrix
+                offset = step @ offset
+            else:
+                mean = np.broadcast_to(operation["mean"], (channels,)).astype(float)
+                std = np.broadcast_to(operation["std"], (channels,)).astype(float)
+                matrix = (operation["scale"] / std)[:, None] * matrix
+                offset = (offset * operation["scale"] - mean) / std
+                is_float = True
+
+        transform = np.hstack([matrix, offset[:, None]]).astype(np.float32)
+
+        def stage(frame):
+            # cv2.transform keeps the input depth, so normalizing needs floats
+            if is_float and frame.dtype != np.float32:
+                frame = frame.astype(np.float32)
+            return cv2.transform(frame, transform)
+
+        return stage, channels, order, is_float
@@ -0,0 +1,177 @@
+import os
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import cv2
+
+from modules.preprocessing import Pipeline, writeFrame
+
+# the names of the tiles, see tileRegions, regions can't use them
+TILE_NAME = re.compile(r"tile_\d+_\d+", re.IGNORECASE)
+
+
+def validateRegion(region: tuple[str, int, int, int, int]) -> tuple:
+    """
+    Checks a named region of interest.
+
+    Args:
+        region (tuple[str, int, int, int, int]): The name, x, y, width and height
+            of the region on the cropped frame.
+
+    Returns:
+        tuple[str, int, int, int, int]: The region with integer coordinates.
+    """
+
+    name, x, y, width, height = region
+    name = str(name).strip()
+
+    # the name is used as the folder of the region
+    if not name or name in (".", "..") or any(c in name for c in "/\\:"):
+        raise ValueError(f"Invalid region name: {name!r}")
+    if TILE_NAME.fullmatch(name):
+        raise ValueError(f"Region name {name} is reserved for the tiles")
+    if int(width) < 1 or int(height) < 1:
+        raise ValueError(f"Region {name} must have a positive size")
+    if int(x) < 0 or int(y) < 0:
+        raise ValueError(f"Region {name} must not start outside of the frame")
+
+    return name, int(x), int(y), int(width), int(height)
+
+
+def validateRegions(regions: list[tuple[str, int, int, int, int]]) -> list:
+    """
+    Checks a list of named regions of interest.
+
+    Args:
+        regions (list[tuple[str, int, int, int, int]]): The name, x, y, width and
+            height of every region on the cropped frame.
+
+    Returns:
+        list[tuple[str, int, int, int, int]]: The regions with integer coordinates.
+    """
+
+    regions = [validateRegion(region) for region in regions]
+
+    # the names are folders, which may not be case sensitive
+    names = [name.lower() for name, *_ in regions]
+    if len(set(names)) != len(names):
+        raise ValueError("Region names must be unique")
+
+    return regions
+
+
+def tileRegions(
+    width: int,
+    height: int,
+    tile_width: int,
+    tile_height: int,
+    stride_x: int = None,
+    stride_y: int = None,
+) -> list[tuple[str, int, int, int, int]]:
+    """
+    Covers a frame with a grid of tiles. Tiles that would reach over the edge
+    are left out, so every tile has the full size.
+
+    Args:
+        width (int): The width of the cropped frame.
+        height (int): The height of the cropped frame.
+        tile_width (int): The width of a tile.
+        tile_height (int): The height of a tile.
+        stride_x (int, optional): The horizontal distance of the tiles, defaults to the tile width.
+        stride_y (int, optional): The vertical distance of the tiles, defaults to the tile height.
+
+    Returns:
+        list[tuple[str, int, int, int, int]]: The tiles named "tile_{row}_{column}".
+    """
+
+    stride_x = stride_x or tile_width
+    stride_y = stride_y or tile_height
+    if min(tile_width, tile_height, stride_x, stride_y) < 1:
+        raise ValueError("Tile size and stride must be positive")
+
+    return [
+        (f"tile_{row}_{column}", x, y, tile_width, tile_height)
+        for row, y in enumerate(range(0, height - tile_height + 1, stride_y))
+        for column, x in enumerate(range(0, width - tile_width + 1, stride_x))
+    ]
+
+
+def sliceRegions(
+    frame: cv2.Mat, regions: list[tuple[str, int, int, int, int]]
+) -> list[tuple[str, cv2.Mat]]:
+    """
+    Slices the regions out of a frame without copying it. Regions are clipped
+    to the frame and left out when nothing of them is on the frame.
+
+    Args:
+        frame (cv2.Mat): The cropped frame.
+        regions (list[tuple[str, int, int, int, int]]): The named regions.
+
+    Returns:
+        list[tuple[str, cv2.Mat]]: The name and a view of every region.
+    """
+
+    height, width = frame.shape[:2]
+    patches = []
+    for name, x, y, region_width, region_height in regions:
+        right = min(x + region_width, width)
+        bottom = min(y + region_height, height)
+        if x < right and y < bottom:
+            patches.append((name, frame[y:bottom, x:right]))
+    return patches
+
+
+def writeRegions(
+    pool: ThreadPoolExecutor,
+    output_path: str,
+    file_stem: str,
+    frame: cv2.Mat,
+    regions: list[tuple[str, int, int, int, int]],
+    pipeline: Pipeline,
+) -> list[Future]:
+    """
+    Writes every region of one decoded frame into the folder of the region.
+    The patches are processed and encoded in the pool, OpenCV releases the GIL
+    while encoding, so the next frame can be decoded meanwhile.
+
+    Args:
+        pool (ThreadPoolExecutor): The pool encoding the patches.
+        output_path (str): The folder with one sub folder per region.
+        file_stem (str): The file name of the patches, without extension.
+        frame (cv2.Mat): The cropped frame, it must not be changed until the writes are done.
+        regions (list[tuple[str, int, int, int, int]]): The named regions.
+        pipeline (Pipeline): The preprocessing applied to every patch.
+
+    Returns:
+        list[Future]: The pending writes, the results are the written paths.
+    """
+
+    return [
+        pool.submit(
+            _writePatch, os.path.join(output_path, name, file_stem), patch, pipeline
+        )
+        for name, patch in sliceRegions(frame, regions)
+    ]
+
+
+def makeRegionFolders(
+    output_path: str, regions: list[tuple[str, int, int, int, int]]
+) -> None:
+    """
+    Creates the folder of every region in the output folder.
+
+    Args:
+        output_path (str): The output folder.
+        regions (list[tuple[str, int, int, int, int]]): The named regions.
+    """
+
+    for name, *_ in regions:
+        os.makedirs(os.path.join(output_path, name), exist_ok=True)
+
+
+def _writePatch(path: str, patch: cv2.Mat, pipeline: Pipeline) -> str:
+    """
+    Helper function to process and write one patch.
+    """
+
+    return writeFrame(path, pipeline.apply(patch))
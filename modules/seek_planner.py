@@ -0,0 +1,193 @@
+import csv
+import json
+import os
+
+from configs.globals import FORWARD_DECODE_LIMIT
+
+# column names or keys that name the values of a target list
+FRAME_KEYS = ("frame", "frames", "frame_number", "frame_numbers")
+TIME_KEYS = ("timestamp", "timestamps", "time", "times", "seconds", "t")
+
+UNITS = ("seconds", "frames")
+
+
+def parseTime(value: str | int | float) -> float:
+    """
+    Parses a timestamp in seconds or in the [HH:]MM:SS[.fff] format.
+
+    Args:
+        value (str | int | float): The timestamp.
+
+    Returns:
+        float: The timestamp in seconds.
+    """
+
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    seconds = 0.0
+    for part in str(value).strip().split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def loadTargets(path: str, fps: float, unit: str = "seconds") -> list[int]:
+    """
+    Loads a CSV or JSON list of timestamps or frame numbers as frame numbers.
+
+    A CSV file has one target per row. When the first row is a header, the
+    first column named like a frame or a time is used, otherwise the first
+    column. A JSON file is a list of values, a list of objects, or an object
+    with a "frames" or "timestamps" list. Named columns and keys set the unit.
+
+    Args:
+        path (str): The path to the CSV or JSON file.
+        fps (float): The frames per second of the video.
+        unit (str, optional): "seconds" or "frames" for values without a name.
+            Frame numbers start at 0.
+
+    Returns:
+        list[int]: The frame numbers in file order, with duplicates.
+    """
+
+    if unit not in UNITS:
+        raise ValueError(f"Unknown target unit: {unit}")
+    if not os.path.exists(path):
+        raise ValueError(f"Target list does not exist: {path}")
+
+    if path.lower().endswith(".json"):
+        values, unit = _readJSON(path, unit)
+    else:
+        values, unit = _readCSV(path, unit)
+
+    try:
+        if unit == "frames":
+            return [int(float(value)) for value in values]
+
+        # the frame on screen at the time, like the compare clock
+        return [int(parseTime(value) * fps + 1e-6) for value in values]
+    except (TypeError, ValueError) as error:
+        raise ValueError(f"Invalid target in {path}: {error}") from None
+
+
+def planSeeks(
+    frame_numbers: list[int], max_frames: int, max_span: int = None
+) -> list[tuple[bool, list[int]]]:
+    """
+    Plans the decoding of a list of target frames with as little work as possible.
+
+    The targets are sorted and deduplicated and split into groups wherever the
+    gap to the next target is larger than FORWARD_DECODE_LIMIT. Within a group
+    the frames in between are grabbed without converting them. A group only
+    seeks when it is too far ahead of the previous group, because the backend
+    decodes from the keyframe before the target on every seek anyway.
+
+    With max_span, a group that would span more frames is split and the next
+    part seeks, so the parts of a long, dense group can be decoded in parallel.
+
+    Args:
+        frame_numbers (list[int]): The target frame numbers in any order.
+        max_frames (int): The number of frames of the video, later targets are skipped.
+        max_span (int, optional): The most frames a group spans, from its first frame.
+
+    Returns:
+        list[tuple[bool, list[int]]]: Per group whether to seek to its first frame
+            and its sorted frame numbers.
+    """
+
+    targets = sorted({n for n in frame_numbers if 0 <= n < max_frames})
+
+    groups = []
+    for frame_number in targets:
+        if (
+            groups
+            and frame_number - groups[-1][1][-1] <= FORWARD_DECODE_LIMIT
+            and (max_span is None or frame_number - groups[-1][1][0] < max_span)
+        ):
+            groups[-1][1].append(frame_number)
+        else:
+            # the reader starts at the first frame, so the first group only
+            # seeks when it is far away from it
+            seek = bool(groups) or frame_number > FORWARD_DECODE_LIMIT
+            groups.append((seek, [frame_number]))
+
+    return groups
+
+
+def _readCSV(path: str, unit: str) -> tuple[list[str], str]:
+    """
+    Helper function to read the target column of a CSV file.
+    """
+
+    with open(path, newline="") as file:
+        rows = [row for row in csv.reader(file) if row and row[0].strip()]
+
+    if not rows:
+        return [], unit
+
+    column = 0
+    try:
+        parseTime(rows[0][0])
+    except ValueError:
+        # the first row is a header
+        header = [name.strip().lower() for name in rows.pop(0)]
+        column, unit = _findColumn(header, unit)
+
+    try:
+        return [row[column] for row in rows], unit
+    except IndexError:
+        raise ValueError(f"Every row in {path} needs the column {column + 1}") from None
+
+
+def _readJSON(path: str, unit: str) -> tuple[list, str]:
+    """
+    Helper function to read the target values of a JSON file.
+    """
+
+    with open(path) as file:
+        data = json.load(file)
+
+    if isinstance(data, dict):
+        key, unit = _findKey(data)
+        data = data[key]
+
+    if not isinstance(data, list):
+        raise ValueError(f"Expected a list of targets in {path}")
+
+    if data and isinstance(data[0], dict):
+        key, unit = _findKey(data[0])
+        try:
+            data = [item[key] for item in data]
+        except (KeyError, TypeError):
+            raise ValueError(f"Every target in {path} needs the key {key}") from None
+
+    if any(value is None or isinstance(value, (bool, list, dict)) for value in data):
+        raise ValueError(f"Targets in {path} must be numbers or timestamps")
+
+    return data, unit
+
+
+def _findColumn(header: list[str], unit: str) -> tuple[int, str]:
+    """
+    Helper function to find the target column of a CSV header and its unit.
+    """
+
+    for i, name in enumerate(header):
+        if name in FRAME_KEYS:
+            return i, "frames"
+        if name in TIME_KEYS:
+            return i, "seconds"
+    return 0, unit
+
+
+def _findKey(item: dict) -> tuple[str, str]:
+    """
+    Helper function to find the target key of a JSON object and its unit.
+    """
+
+    for key in item:
+        if key.lower() in FRAME_KEYS:
+            return key, "frames"
+        if key.lower() in TIME_KEYS:
+            return key, "seconds"
+    raise ValueError(f"No frame or timestamp key in {list(item)}")
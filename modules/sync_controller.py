@@ -0,0 +1,348 @@
+import time
+from collections import deque
+from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
+
+from configs.globals import SYNC_REQUEST_TIMEOUT, SYNC_STATS_INTERVAL
+from modules.video_engine import VideoEngine
+
+
+class StreamProxy(QObject):
+    """
+    Lives in the GUI thread and passes the frame requests and the shown frames
+    of one stream between the controller and its engine thread.
+    """
+
+    # emiter for the frame number to show
+    emit_frame = Signal(int)
+    # emiter for the stream index and position of the shown frame
+    emit_shown = Signal(int, int)
+
+    def __init__(self, index: int) -> None:
+        super().__init__()
+        self.index = index
+
+    @Slot(int)
+    def shown(self, position: int) -> None:
+        self.emit_shown.emit(self.index, position)
+
+
+class SyncController(QObject):
+    """
+    Drives two or more video engines from one shared clock for side by side
+    comparison. Every engine decodes in its own thread. The clock is a time in
+    seconds, and every stream shows the frame that is on screen at that time
+    at its own fps, so sources with different fps stay frame locked.
+
+    A stream that is still decoding gets only the newest request once it is
+    done, so a slow stream drops frames instead of falling behind the clock.
+
+    Methods:
+        initialize(): Starts the engine threads and shows the first frames.
+        stop(): Stops the playback and the engine threads.
+        frameAt(index, t): Gets the frame number of a stream at a clock time.
+        getTime(): Gets the current clock time.
+        seek(t): Shows the frames of all streams at a clock time.
+        step(delta): Steps the clock by frames of the reference stream.
+        play(state): Plays or pauses all streams on the shared clock.
+        getStats(): Gets the sync drift and throughput of every stream.
+    """
+
+    # emiters for UI update
+    emit_time = Signal(float)
+    emit_stats = Signal(object)
+
+    def __init__(self, paths: list[str]) -> None:
+        """
+        Creates an engine and a thread for every video.
+
+        Args:
+            paths (list[str]): The paths of the videos, the first one is the reference
+                for frame steps.
+
+        Attributes:
+            engines (list[VideoEngine]): The engine of every stream.
+            fps (float): The fps of the reference stream.
+            duration (float): The length in seconds of the shortest stream.
+            time (float): The clock time while paused.
+            state_playing (bool): True while playing.
+        """
+
+        super().__init__()
+
+        if len(paths) < 2:
+            raise ValueError("At least two videos are needed for a comparison")
+
+        self.engines = []
+        self.threads = []
+        self.proxies = []
+
+        for index, path in enumerate(paths):
+            engine = VideoEngine(path)
+            thread = QThread()
+            engine.moveToThread(thread)
+
+            # the requests are queued into the engine thread, so the GUI never
+            # decodes, and the shown frames are queued back into the GUI thread
+            proxy = StreamProxy(index)
+            proxy.emit_frame.connect(engine.setVideoReaderPosition)
+            engine.emit_new_frame_index.connect(proxy.shown)
+            proxy.emit_shown.connect(self._frameShown)
+
+            self.engines.append(engine)
+            self.threads.append(thread)
+            self.proxies.append(proxy)
+
+        self.fps = self.engines[0].fps
+        self.duration = min(engine.max_frames / engine.fps for engine in self.engines)
+
+        self.time = 0.0
+        self.state_playing = False
+        self.play_origin = 0.0
+
+        # request state per stream: the frame being decoded, the request
+        # waiting for it and the frame on screen
+        count = len(self.engines)
+        self.requested = [None] * count
+        self.requested_at = [0.0] * count
+        self.pending = [None] * count
+        self.shown = [-1] * count
+
+        # stats per stream
+        self.drift = [0.0] * count
+        self.max_drift = [0.0] * count
+        self.dropped = [0] * count
+        self.shown_times = [deque() for _ in range(count)]
+        self.last_stats = 0.0
+
+        # tick at the rate of the fastest stream
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._playStep)
+        self.interval = int(1000 / max(engine.fps for engine in self.engines))
+
+    def initialize(self) -> None:
+        """
+        Starts the engine threads and shows the first frame of every stream.
+        """
+
+        for thread in self.threads:
+            thread.start()
+        self.seek(0.0)
+
+    def stop(self) -> None:
+        """
+        Stops the playback and the engine threads.
+        """
+
+        self.play(False)
+        for engine, thread in zip(self.engines, self.threads):
+            engine.stop()
+            thread.quit()
+            thread.wait()
+
+    #
+    # ------------------------------- CLOCK -------------------------------
+    #
+
+    def frameAt(self, index: int, t: float) -> int:
+        """
+        Gets the frame number of a stream at a clock time.
+
+        Args:
+            index (int): The index of the stream.
+            t (float): The clock time in seconds.
+
+        Returns:
+            int: The frame that is on screen at the time, within the stream.
+        """
+
+        engine = self.engines[index]
+
+        # the small offset keeps exact frame times from rounding down a frame
+        frame_number = int(t * engine.fps + 1e-6)
+        return min(max(frame_number, 0), engine.max_frames - 1)
+
+    def getTime(self) -> float:
+        """
+        Gets the current clock time.
+
+        Returns:
+            float: The clock time in seconds.
+        """
+
+        if self.state_playing:
+            return time.perf_counter() - self.play_origin
+        return self.time
+
+    @Slot(float)
+    def seek(self, t: float) -> None:
+        """
+        Shows the frames of all streams at a clock time.
+
+        Args:
+            t (float): The clock time in seconds.
+        """
+
+        self.time = min(max(t, 0.0), self.duration)
+        if self.state_playing:
+            self.play_origin = time.perf_counter() - self.time
+
+        self._requestAll(self.time)
+
+    @Slot(int)
+    def step(self, delta: int) -> None:
+        """
+        Steps the clock by frames of the reference stream. The other streams
+        follow to the frame that is on screen at the new time.
+
+        Args:
+            delta (int): The number of reference frames to step.
+        """
+
+        frame_number = self.frameAt(0, self.getTime()) + delta
+        self.seek(frame_number / self.fps)
+
+    def play(self, state: bool) -> None:
+        """
+        Play or pause all streams on the shared clock.
+
+        Args:
+            state (bool): True to play, False to pause.
+        """
+
+        if state == self.state_playing:
+            return
+
+        if state:
+            # start over when the end was reached
+            if self.time >= self.duration - 1 / self.fps:
+                self.time = 0.0
+            self.play_origin = time.perf_counter() - self.time
+            self.state_playing = True
+            self.timer.start(self.interval)
+        else:
+            self.time = self.getTime()
+            self.state_playing = False
+            self.timer.stop()
+
+    def _playStep(self) -> None:
+        """
+        Helper function to request the frames at the current clock time.
+        """
+
+        t = self.getTime()
+        if t >= self.duration:
+            self.play(False)
+            self.time = self.duration
+            self.emit_time.emit(self.time)
+            return
+
+        self._requestAll(t)
+        self.emit_time.emit(t)
+
+    #
+    # ------------------------------- REQUESTS -------------------------------
+    #
+
+    def _requestAll(self, t: float) -> None:
+        """
+        Helper function to request the frames of all streams at a clock time.
+        """
+
+        for index in range(len(self.engines)):
+            self._request(index, self.frameAt(index, t))
+
+        if not self.state_playing:
+            self.emit_time.emit(t)
+
+    def _request(self, index: int, frame_number: int) -> None:
+        """
+        Helper function to request a frame, or queue it while the stream decodes.
+        """
+
+        now = time.perf_counter()
+
+        # a failed decode never reports back, so free the stream after a while
+        busy = self.requested[index] is not None
+        if busy and now - self.requested_at[index] > SYNC_REQUEST_TIMEOUT:
+            busy = False
+
+        if busy:
+            if frame_number == self.requested[index]:
+                return
+            # only the newest request is kept, the one it replaces is dropped
+            if self.pending[index] is not None:
+                self.dropped[index] += 1
+            self.pending[index] = frame_number
+            return
+
+        if frame_number == self.shown[index]:
+            return
+
+        self.requested[index] = frame_number
+        self.requested_at[index] = now
+        self.proxies[index].emit_frame.emit(frame_number)
+
+    @Slot(int, int)
+    def _frameShown(self, index: int, position: int) -> None:
+        """
+        Helper function to track the shown frame of a stream and send its next request.
+        """
+
+        now = time.perf_counter()
+        engine = self.engines[index]
+
+        # the engine reports the position after the shown frame. A frame that
+        # is shown again after a preview scale change, or the late answer to a
+        # timed out request, is not the answer to the request in flight
+        if position - 1 != self.requested[index]:
+            return
+
+        self.shown[index] = position - 1
+        self.requested[index] = None
+
+        # the distance to the frame the clock is at, positive is ahead of the
+        # clock and negative is behind, zero while the stream is in sync
+        expected = self.frameAt(index, self.getTime())
+        self.drift[index] = (position - 1 - expected) / engine.fps * 1000
+        if self.state_playing:
+            self.max_drift[index] = max(self.max_drift[index], abs(self.drift[index]))
+
+        shown_times = self.shown_times[index]
+        shown_times.append(now)
+        while shown_times[0] < now - 1.0:
+            shown_times.popleft()
+
+        if self.pending[index] is not None:
+            frame_number = self.pending[index]
+            self.pending[index] = None
+            self._request(index, frame_number)
+
+        if not self.state_playing or now - self.last_stats >= SYNC_STATS_INTERVAL:
+            self.last_stats = now
+            self.emit_stats.emit(self.getStats())
+
+    #
+    # ------------------------------- STATS -------------------------------
+    #
+
+    def getStats(self) -> list[dict]:
+        """
+        Gets the sync drift and throughput of every stream.
+
+        Returns:
+            list[dict]: Per stream the file name, the shown frame, the drift and
+                the largest drift while playing in ms, the frames shown in the
+                last second and the dropped frame requests.
+        """
+
+        return [
+            {
+                "file_name": engine.file_name,
+                "frame": self.shown[index],
+                "drift": self.drift[index],
+                "max_drift": self.max_drift[index],
+                "fps": len(self.shown_times[index]),
+                "dropped": self.dropped[index],
+            }
+            for index, engine in enumerate(self.engines)
+        ]
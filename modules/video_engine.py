@@ -1,78 +1,129 @@
 import cv2
-import os
+import math
 from PySide6.QtCore import QObject, Signal, Slot, QTimer
 
+from configs.globals import DECODER_MODE, PREVIEW_MAX_DOWNSCALE
+from modules.decoder_process import ProcessFrameReader
+from modules.frame_reader import FrameReader
+from modules.preprocessing import Pipeline
+from modules.regions import tileRegions, validateRegions
+
 
 class VideoEngine(QObject):
     """
     This class provides the backend for video processing and control with OpenCV.
+    It is a Qt adapter for the FrameReader, which does the frame access and cropping.
 
     Methods:
         load(path): Loads a video file and initializes the VideoEngine capture properties.
         updateCropValues(left, right, top, bottom): Updates the crop values for the video
         getCropValues(): Gets the current crop values for the video.
+        setPipeline(pipeline): Sets the preprocessing applied at display and save time.
+        setCropEditing(state): Shows the uncropped frame while editing the crop on the video.
+        setRegions(regions): Sets the named regions of interest on the cropped frame.
+        setTiling(tile_width, tile_height, stride_x, stride_y): Covers the cropped frame with tiles.
+        getRegions(): Gets the named regions and tiles saved instead of the whole frame.
         setVideoReaderPosition(frame_number): Update the current position of the video reader.
         getVideoReaderPosition(): Gets the current position of the video reader.
         changeVideoReaderPosition(delta): Update the current position of the video reader by a delta value.
-        getNextFrame(): Gets the next frame from the video source.
+        generateFrame(): Shows the next frame from the video source.
+        setDisplaySize(width, height): Decodes previews at a resolution that fits the display.
+        play(state, reverse): Play or pause the video playback, forwards or backwards.
+        markIn(): Marks the active frame as the start of an export range.
+        markOut(): Marks the active frame as the end of an export range.
+        getExportRanges(): Gets the marked export ranges.
+        clearExportRanges(): Removes all marked export ranges.
         save(output_path): Save the current active frame to the specified output path.
     """
 
     # emiters for UI update
     emit_new_frame = Signal(object)
     emit_new_frame_index = Signal(int)
+    emit_export_ranges = Signal(object)
+    emit_crop_values = Signal(int, int, int, int)
+    emit_regions = Signal(object)
+    emit_saved = Signal(str)
 
-    def __init__(self, path: str) -> None:
+    def __init__(self, path: str, decoder: str = DECODER_MODE) -> None:
         """
         Initializes the VideoEngine with default values.
 
         Args:
             path(str): Path to the video source
+            decoder (str, optional): "thread" to decode in the engine thread, or
+                "process" to decode in a separate process.
 
         Attributes:
-            source (cv2.VideoCapture): The video source.
+            reader (FrameReader): The Qt independent frame access for the video,
+                a ProcessFrameReader when decoding in a separate process.
+            path (str): The path to the video file.
             file_name (str): The name of the video file without extension.
             width (int): The width of the video frames.
             height (int): The height of the video frames.
             fps (float): The frames per second of the video.
             max_frames (int): The total number of frames in the video.
             crop_values (dict): The crop values for the video.
-            active_frame (cv2.Mat): The currently active frame from the video.
+            pipeline (Pipeline): The preprocessing applied at display and save time.
+            crop_editing (bool): True while the crop is edited on the uncropped frame.
+            display_size (tuple): The size of the display in device pixels, or None.
+            regions (list): The named (name, x, y, width, height) regions of interest.
+            tiling (tuple): The tile width, tile height and strides, or None.
+            mark_in (int): The frame number of the pending in mark, or None.
+            export_ranges (list): The marked (in, out) frame number ranges for export.
         """
 
         super().__init__()
 
         # Load the video
-        # check if the file exists
-        if not os.path.exists(path):
-            raise ValueError(f"Video file does not exist: {path}")
-
-        # load the video file and check if it can be opened
-        self.source = cv2.VideoCapture(path)
-        if not self.source.isOpened():
-            raise ValueError(f"Unable to open video file: {path}")
+        if decoder == "thread":
+            self.reader = FrameReader(path)
+        elif decoder == "process":
+            self.reader = ProcessFrameReader(path)
+        else:
+            raise ValueError(f"Unknown decoder mode: {decoder}")
 
         # set globals
-        self.file_name = os.path.splitext(os.path.basename(path))[0]
-        self.width = int(self.source.get(cv2.CAP_PROP_FRAME_WIDTH))
-        self.height = int(self.source.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        self.fps = self.source.get(cv2.CAP_PROP_FPS)
-        self.max_frames = int(self.source.get(cv2.CAP_PROP_FRAME_COUNT))
-        self.active_frame = None
-
-        # this values are used to crop the video
-        self.crop_values = {
-            "left": 0,
-            "right": 0,
-            "top": 0,
-            "bottom": 0,
-        }
+        self.path = self.reader.path
+        self.file_name = self.reader.file_name
+        self.width = self.reader.width
+        self.height = self.reader.height
+        self.fps = self.reader.fps
+        self.max_frames = self.reader.max_frames
+        self.crop_values = self.reader.crop_values
+        self.pipeline = Pipeline()
+        self.crop_editing = False
+        self.display_size = None
+
+        # the regions are saved instead of the whole cropped frame
+        self.regions = []
+        self.tiling = None
+
+        # the in / out ranges marked for export
+        self.mark_in = None
+        self.export_ranges = []
 
         # add a timer for the video playback
         self.state_playing = False
+        self.play_direction = 1
         self.timer = QTimer()
         self.timer.timeout.connect(self._playStep)
 
+    @property
+    def active_frame(self) -> None | cv2.Mat:
+        """
+        The currently active frame from the video.
+        """
+
+        return self.reader.active_frame
+
+    @property
+    def active_index(self) -> int:
+        """
+        The frame number of the active frame.
+        """
+
+        return self.reader.active_index
+
     @Slot()
     def initialize(self) -> None:
         """
@@ -89,8 +140,8 @@ class VideoEngine(QObject):
         Cleanup if thread is closed.
         """
 
-        if self.source is not None:
-            self.source.release()
+        self.play(False)
+        self.reader.release()
 
     #
     # ------------------------------- VIDEO EDITIONG -------------------------------
@@ -111,19 +162,17 @@ class VideoEngine(QObject):
 
         """
 
-        # only update the values if they are changed
-        if left is not None:
-            self.crop_values["left"] = left
-        if right is not None:
-            self.crop_values["right"] = right
-        if top is not None:
-            self.crop_values["top"] = top
-        if bottom is not None:
-            self.crop_values["bottom"] = bottom
+        self.reader.updateCropValues(left, right, top, bottom)
+        self.emit_crop_values.emit(*self.getCropValues())
 
-        # trigger the frame generator to apply the changes to the
-        # current frame
-        self.changeVideoReaderPosition(0)
+        # the cropped area is stretched over the display, so a smaller crop
+        # may need a higher preview resolution
+        if self._updatePreviewScale():
+            return
+
+        # while editing on the video the overlay gives the feedback
+        if not self.crop_editing:
+            self._emitActiveFrame()
 
     def getCropValues(self) -> tuple[int, int, int, int]:
         """
@@ -133,19 +182,92 @@ class VideoEngine(QObject):
             tuple[int, int, int, int]: The left, right, top, and bottom crop values.
         """
 
-        return (
-            self.crop_values["left"],
-            self.crop_values["right"],
-            self.crop_values["top"],
-            self.crop_values["bottom"],
+        return self.reader.getCropValues()
+
+    @Slot(object)
+    def setPipeline(self, pipeline: Pipeline) -> None:
+        """
+        Sets the preprocessing applied to the active frame at display and save time.
+
+        Args:
+            pipeline (Pipeline): The preprocessing pipeline.
+        """
+
+        self.pipeline = pipeline
+        self.reader.setDisplay(self.pipeline, self.crop_editing)
+        self._emitActiveFrame()
+
+    @Slot(bool)
+    def setCropEditing(self, state: bool) -> None:
+        """
+        Shows the uncropped frame while the crop is edited on the video.
+
+        Args:
+            state (bool): True to start editing, False to show the cropped frame again.
+        """
+
+        self.crop_editing = state
+        self.reader.setDisplay(self.pipeline, self.crop_editing)
+
+        # the uncropped frame is stretched over the display while editing
+        if not self._updatePreviewScale():
+            self._emitActiveFrame()
+
+    @Slot(object)
+    def setRegions(self, regions: list[tuple[str, int, int, int, int]]) -> None:
+        """
+        Sets the named regions of interest. Every frame is decoded once and all
+        regions are sliced out of it when saving or exporting.
+
+        Args:
+            regions (list[tuple[str, int, int, int, int]]): The name, x, y, width and
+                height of every region on the cropped frame.
+        """
+
+        self.regions = validateRegions(regions)
+        self.emit_regions.emit(self.getRegions())
+
+    @Slot(int, int, int, int)
+    def setTiling(
+        self, tile_width: int, tile_height: int, stride_x: int = 0, stride_y: int = 0
+    ) -> None:
+        """
+        Covers the cropped frame with a grid of tiles, in addition to the regions.
+
+        Args:
+            tile_width (int): The width of a tile, 0 turns the tiling off.
+            tile_height (int): The height of a tile.
+            stride_x (int, optional): The horizontal distance of the tiles, 0 for the tile width.
+            stride_y (int, optional): The vertical distance of the tiles, 0 for the tile height.
+        """
+
+        if tile_width <= 0 or tile_height <= 0:
+            self.tiling = None
+        else:
+            self.tiling = (tile_width, tile_height, stride_x, stride_y)
+        self.emit_regions.emit(self.getRegions())
+
+    def getRegions(self) -> list[tuple[str, int, int, int, int]]:
+        """
+        Gets the named regions and the tiles of the current crop.
+
+        Returns:
+            list[tuple[str, int, int, int, int]]: The regions in full resolution pixels
+                of the cropped frame, empty when the whole frame is saved.
+        """
+
+        if self.tiling is None:
+            return list(self.regions)
+
+        left, right, top, bottom = self.getCropValues()
+        return self.regions + tileRegions(
+            self.width - left - right, self.height - top - bottom, *self.tiling
         )
 
     #
     # ------------------------------- VIDEO CONTROL -------------------------------
     #
 
-    # caution: this slows down over time when playing a video, so use this only
-    # for per-frame changes and not for playback
     @Slot(int)
     def setVideoReaderPosition(self, frame_number: int) -> None:
         """
@@ -158,8 +280,7 @@ class VideoEngine(QObject):
 
         # set the current position of the video reader when in bounds
         if 0 <= frame_number < self.max_frames:
-            self.source.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-            self.generateFrame()
+            self._showFrame(frame_number)
 
     def getVideoReaderPosition(self) -> int:
         """
@@ -168,7 +289,9 @@ class VideoEngine(QObject):
         Returns:
             int: The current frame number of the video reader.
         """
-        return int(self.source.get(cv2.CAP_PROP_POS_FRAMES))
+
+        # the +1 matches the position opencv reports after reading the active frame
+        return self.active_index + 1
 
     @Slot(int)
     def changeVideoReaderPosition(self, delta: int) -> None:
@@ -181,8 +304,7 @@ class VideoEngine(QObject):
         """
 
         # set the new position of the video reader
-        # the -1 is compensate the +1 from opencv.read()
-        new_pos = self.getVideoReaderPosition() + delta - 1
+        new_pos = self.active_index + delta
         # check if the new position is within the bounds of the video
         if 0 <= new_pos < self.max_frames:
             self.setVideoReaderPosition(new_pos)
@@ -190,27 +312,35 @@ class VideoEngine(QObject):
     @Slot()
     def generateFrame(self) -> None:
         """
-        Generates the frame from the video source.
+        Generates the next frame from the video source.
+        """
+
+        self._showFrame(self.active_index + 1)
+
+    def _showFrame(self, frame_number: int) -> None:
+        """
+        Helper function to make a frame the active frame and emit it.
+
+        Args:
+            frame_number (int): The frame number to show.
         """
 
-        # get the next frame from the video source
-        # Note: this automatically updates the position of the video reader
-        ret, frame = self.source.read()
-        if not ret:
+        if self.reader.seek(frame_number) is None:
             return None
 
-        # apply the crop values to the frame
-        # left and right are reversed because the crop values are from the left side
-        left = self.crop_values["left"]
-        right = self.width - self.crop_values["right"]
-        top = self.crop_values["top"]
-        bottom = self.height - self.crop_values["bottom"]
+        self._emitActiveFrame()
 
-        # save it as the active frame
-        self.active_frame = frame[top:bottom, left:right]
+    def _emitActiveFrame(self) -> None:
+        """
+        Helper function to emit the active frame, uncropped while editing the crop.
+        """
+
+        frame = self.getFrame()
+        if frame is None:
+            return None
 
         # emit frame
-        self.emit_new_frame.emit(cv2.cvtColor(self.active_frame, cv2.COLOR_BGR2RGB))
+        self.emit_new_frame.emit(frame)
         self.emit_new_frame_index.emit(self.getVideoReaderPosition())
 
     def getFrame(self) -> None | cv2.Mat:
@@ -219,21 +349,24 @@ class VideoEngine(QObject):
 
         Returns:
             cv2.Mat: The current active frame in RGB format, or None if no frame is available.
+            The frame is uncropped and unprocessed while editing the crop. With the
+            decoder process, it is a view into the shared memory ring, valid while
+            the next DECODER_RING_SLOTS - 2 frames are shown.
         """
-        if self.active_frame is not None:
-            return cv2.cvtColor(self.active_frame, cv2.COLOR_BGR2RGB)
-        else:
-            return None
 
-    def play(self, state: bool) -> None:
+        return self.reader.getDisplayFrame()
+
+    def play(self, state: bool, reverse: bool = False) -> None:
         """
         Play or pause the video playback.
 
         Args:
             state (bool): True to play the video, False to pause it.
+            reverse (bool, optional): True to play the video backwards.
         """
 
         self.state_playing = state
+        self.play_direction = -1 if reverse else 1
 
         if self.state_playing:
             # Start playing based on fps (interval in ms)
@@ -248,12 +381,125 @@ class VideoEngine(QObject):
         """
 
         # called every frame interval
-        self.generateFrame()
+        self._showFrame(self.active_index + self.play_direction)
 
-        # stop when video ends
-        if self.getVideoReaderPosition() >= self.max_frames:
+        # stop when video ends or reaches the start when playing backwards
+        if self.play_direction > 0:
+            if self.getVideoReaderPosition() >= self.max_frames:
+                self.play(False)
+        elif self.active_index <= 0:
             self.play(False)
 
+    @Slot(int, int)
+    def setDisplaySize(self, width: int, height: int) -> None:
+        """
+        Decodes the frames for the display at a reduced resolution when the
+        display is much smaller than the video. Saving still uses the full resolution.
+
+        Args:
+            width (int): The width of the display in device pixels.
+            height (int): The height of the display in device pixels.
+        """
+
+        if width <= 0 or height <= 0:
+            return
+
+        self.display_size = (width, height)
+        self._updatePreviewScale()
+
+    def _updatePreviewScale(self) -> bool:
+        """
+        Helper function to fit the preview scale to the display and the shown
+        area, and to show the active frame again at the new scale.
+
+        Returns:
+            bool: True if the scale changed and the active frame was shown again.
+        """
+
+        if self.display_size is None:
+            return False
+
+        # the cropped area, or the whole frame while editing the crop, is
+        # stretched over the whole display
+        width, height = self.display_size
+        if self.crop_editing:
+            left = right = top = bottom = 0
+        else:
+            left, right, top, bottom = self.getCropValues()
+        needed = min(
+            1.0,
+            width / max(1, self.width - left - right),
+            height / max(1, self.height - top - bottom),
+        )
+
+        # use power of two steps, so resizing the window does not drop the
+        # frame buffer all the time
+        steps = min(
+            math.floor(math.log2(1 / needed)), int(math.log2(PREVIEW_MAX_DOWNSCALE))
+        )
+        changed = self.reader.setPreviewScale(1 / 2**steps)
+        if changed and self.active_index >= 0:
+            self._showFrame(self.active_index)
+        return changed
+
+    #
+    # ------------------------------- RANGE MARKING -------------------------------
+    #
+
+    @Slot()
+    def markIn(self) -> None:
+        """
+        Marks the active frame as the start of an export range.
+        """
+
+        if self.active_index >= 0:
+            self.mark_in = self.active_index
+
+    @Slot()
+    def markOut(self) -> None:
+        """
+        Marks the active frame as the end of an export range started with markIn.
+        Overlapping or adjacent ranges are merged.
+        """
+
+        # a range needs an in mark before the out mark
+        if self.mark_in is None or self.active_index < self.mark_in:
+            return
+
+        ranges = sorted(self.export_ranges + [(self.mark_in, self.active_index)])
+        self.mark_in = None
+
+        # merge overlapping or adjacent ranges so no frame is exported twice
+        merged = [ranges[0]]
+        for start, end in ranges[1:]:
+            if start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+
+        self.export_ranges = merged
+        self.emit_export_ranges.emit(self.getExportRanges())
+
+    def getExportRanges(self) -> list[tuple[int, int]]:
+        """
+        Gets the marked export ranges.
+
+        Returns:
+            list[tuple[int, int]]: The sorted (in, out) frame numbers, both inclusive.
+        """
+
+        return list(self.export_ranges)
+
+    @Slot()
+    def clearExportRanges(self) -> None:
+        """
+        Removes all marked export ranges and the pending in mark.
+        """
+
+        self.mark_in = None
+        self.export_ranges = []
+        self.emit_export_ranges.emit(self.getExportRanges())
+
     #
     # ------------------------------------ MISC -----------------------------------
     #
@@ -268,13 +514,5 @@ class VideoEngine(QObject):
 
         """
 
-        # save the current active frame to the output path when output path is valid
-        if not os.path.exists(output_path):
-            raise ValueError(f"Output path does not exist: {output_path}")
-        cv2.imwrite(
-            os.path.join(
-                output_path,
-                f"{self.file_name}_Frame-{self.getVideoReaderPosition()}.jpg",
-            ),
-            self.active_frame,
-        )
+        self.reader.save(output_path, self.pipeline, self.getRegions())
+        self.emit_saved.emit(output_path)